@@ -1,16 +1,7 @@
-import json
-from collections import defaultdict
-from datetime import datetime
-
-SNAPSHOT_FILE = "data/snapshots.jsonl"
+from .core import load_snapshots, views_per_day
 
 def main():
-    videos = defaultdict(list)
-
-    with open(SNAPSHOT_FILE) as f:
-        for line in f:
-            s = json.loads(line)
-            videos[s["video_id"]].append(s)
+    videos = load_snapshots()
 
     print("\n=== VIRALITY ANALYSIS ===\n")
 
@@ -18,19 +9,14 @@ def main():
         if len(snaps) < 2:
             continue
 
-        snaps.sort(key=lambda x: x["timestamp"])
-        first = snaps[0]
-        last = snaps[-1]
-
-        t1 = datetime.fromisoformat(first["timestamp"])
-        t2 = datetime.fromisoformat(last["timestamp"])
-        days = (t2 - t1).total_seconds() / 86400
-        if days <= 0:
+        first = min(snaps, key=lambda x: x["timestamp"])
+        last = max(snaps, key=lambda x: x["timestamp"])
+        if last["timestamp"] <= first["timestamp"]:
             continue
 
-        vpd = (last["views"] - first["views"]) / days
+        vpd = views_per_day(snaps)
 
         print(f"{vid} | {int(vpd)} views/day")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
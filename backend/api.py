@@ -1,21 +1,32 @@
-import os
 import json
-from datetime import datetime
+import asyncio
+import threading
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from .opportunity_mapper import get_fear_radar, get_opportunity_map
+from .market_brief import get_market_brief
 from .env import load_env
 load_env(".env")
-from .db import init_db, insert_plan, list_plans, get_plan
+from .db import init_db, list_plans, count_plans, get_plan
+from .storage import storage_stats
 from .auth import require_api_key
+from .snapshot_store import get_store
 
 # On réutilise ton V5 pour générer + exporter
-from .opportunity_v5 import slug, render_markdown, compact_for_ui, write_json, ensure_output_dir
-from .opportunity_v4 import load_videos, load_snapshots, get_winners, summarize_market, call_openai_v4
+from .opportunity_v5 import ensure_output_dir
+from .core import LEX_MATCHER, FEAR_MATCHER
+from .plan_service import NoWinnersError, prepare_intel, stream_plan
+from .plan_store import plan_content_bytes, plan_etag, plan_exists, PlanNotFound, PLAN_STORAGE, FORMATS as PLAN_FORMATS
+from .jobs import get_job_manager, job_status, job_result, QueueFullError
+from .llm_cache import cache_stats
+from .market_intel import start_refresher as start_intel_refresher
+from .timing import install as install_timing
 
 
 app = FastAPI(title="YouTube Intelligence API", version="0.1")
@@ -29,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing + GET /metrics
+install_timing(app)
+
 
 class GeneratePlanRequest(BaseModel):
     niche: str = "saas"
@@ -37,14 +51,31 @@ class GeneratePlanRequest(BaseModel):
     top_k: int = 25
     ideas: int = 6
     days: int = 30
-    force: bool = False              # si True, regénère même si cache existe (v2 plus tard)
+    force: bool = False              # si True, ignore le cache LLM (backend/llm_cache.py)
+
+
+def _warmup() -> None:
+    # Chargement initial des JSONL (les requêtes suivantes n'ingèrent que les nouvelles lignes)
+    get_store().refresh()
+    # Classification des titres précalculée (cache par hash de titre)
+    videos = get_store().videos()
+    FEAR_MATCHER.precompute(videos)
+    LEX_MATCHER.precompute(videos)
+    # Intel des presets (threshold_vpd, top_k) recalculée quand les données changent
+    start_intel_refresher()
 
 
 @app.on_event("startup")
 def startup():
     load_env(".env")
     init_db()
-    ensure_output_dir()
+    if PLAN_STORAGE != "inline":
+        ensure_output_dir()
+    # Préchauffage en arrière-plan : /health répond tout de suite, les premières
+    # requêtes data chargent le store elles-mêmes si le warmup n'est pas fini
+    threading.Thread(target=_warmup, name="api-warmup", daemon=True).start()
+    # Jobs interrompus par un restart -> relancés
+    get_job_manager().resume_pending()
 
 
 @app.get("/health")
@@ -67,9 +98,51 @@ def opportunity_map(
     return get_opportunity_map(niche=niche)
 
 
+@app.get("/market-brief")
+def market_brief(
+    niche: str = "business",
+    objective: str = "leads",
+    period: str = "weekly",
+    x_api_key: Optional[str] = Header(default=None, alias="X-API-KEY"),
+):
+    require_api_key(x_api_key)
+    return get_market_brief(niche=niche, objective=objective, period=period)
+
+
+@app.get("/llm-cache/stats")
+def llm_cache_stats():
+    return cache_stats()
+
+
+@app.get("/storage/stats")
+def storage_stats_endpoint():
+    return storage_stats()
+
+
 @app.get("/plans")
-def plans(limit: int = 20):
-    return {"plans": list_plans(limit=limit)}
+def plans(
+    limit: int = 20,
+    before_id: Optional[int] = None,
+    niche: Optional[str] = None,
+    objective: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+):
+    """
+    Pagination par curseur : passer next_before_id de la réponse précédente.
+    total vient des compteurs (niche/objective) ; None si une plage de dates est donnée.
+    """
+    limit = max(1, min(limit, 200))
+    rows = list_plans(
+        limit=limit, before_id=before_id, niche=niche, objective=objective,
+        created_from=created_from, created_to=created_to,
+    )
+    dated = created_from is not None or created_to is not None
+    return {
+        "plans": rows,
+        "next_before_id": rows[-1]["id"] if len(rows) == limit else None,
+        "total": None if dated else count_plans(niche=niche, objective=objective),
+    }
 
 
 @app.get("/plans/{plan_id}")
@@ -80,97 +153,135 @@ def plan(plan_id: int):
     return row
 
 
+PLAN_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        # pas de "*" : seul un ETag exact (fort ou faible) d'un plan existant vaut 304
+        if tag == etag or tag == "W/" + etag:
+            return True
+    return False
+
+
 @app.get("/plans/{plan_id}/content")
-def plan_content(plan_id: int, format: str = "ui"):
+def plan_content(
+    plan_id: int,
+    format: str = "ui",
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+):
     """
     format: ui | json | md
+    Plans immuables : ETag fort (id + format), 304 si le client l'a déjà.
     """
-    row = get_plan(plan_id)
-    if not row:
+    if format not in PLAN_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    etag = plan_etag(plan_id, format)
+    headers = {"ETag": etag, "Cache-Control": PLAN_CACHE_CONTROL}
+    if _etag_matches(if_none_match, etag):
+        # l'ETag est prévisible : on vérifie que le plan existe avant de répondre 304
+        if not plan_exists(plan_id, format):
+            raise HTTPException(status_code=404, detail="Plan not found")
+        return Response(status_code=304, headers=headers)
+
+    try:
+        body = plan_content_bytes(plan_id, format)
+    except PlanNotFound:
         raise HTTPException(status_code=404, detail="Plan not found")
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    if format == "ui":
-        path = row["plan_ui_json_path"]
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
 
-    if format == "json":
-        path = row["plan_json_path"]
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+@app.post("/generate-plan")
+async def generate_plan(req: GeneratePlanRequest):
+    # Exécuté dans le pool de jobs : on attend sans bloquer un thread du serveur.
+    # Les accès SQLite (insert / dedupe / statut) passent par le threadpool, pas par la boucle.
+    job_id, _ = await run_in_threadpool(_submit_plan_job, req)
+    fut = get_job_manager().future(job_id)
+    if fut is not None:
+        try:
+            return await asyncio.wrap_future(fut)
+        except NoWinnersError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # job déjà terminé entre-temps
+    st = await run_in_threadpool(job_status, job_id)
+    if st and st["status"] == "done":
+        return await run_in_threadpool(job_result, job_id)
+    raise _job_failure(st)
+
+
+def _job_failure(st) -> HTTPException:
+    # erreur persistée par jobs._run : "NomException: message"
+    error = (st or {}).get("error") or "Job failed"
+    prefix = NoWinnersError.__name__ + ": "
+    if error.startswith(prefix):
+        return HTTPException(status_code=400, detail=error[len(prefix):])
+    return HTTPException(status_code=500, detail=error)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate-plan/stream")
+def generate_plan_stream(req: GeneratePlanRequest):
+    """
+    Server-Sent Events : token (delta brut), opportunity / calendar ({index, item})
+    dès qu'un élément est complet, puis done (même payload que /generate-plan)
+    ou error.
+    """
+    params = dict(req)
+    try:
+        intel = prepare_intel(params)
+    except NoWinnersError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def events():
+        try:
+            for event, data in stream_plan(params, intel):
+                yield _sse(event, {"text": data} if event == "token" else data)
+        except Exception as e:
+            yield _sse("error", {"detail": f"{type(e).__name__}: {e}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    if format == "md":
-        path = row["plan_md_path"]
-        with open(path, "r", encoding="utf-8") as f:
-            return {"markdown": f.read()}
 
-    raise HTTPException(status_code=400, detail="Invalid format")
+def _submit_plan_job(req: GeneratePlanRequest):
+    try:
+        return get_job_manager().submit("generate_plan", dict(req))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
-@app.post("/generate-plan")
-def generate_plan(req: GeneratePlanRequest):
-    # 1) Charger data
-    videos = load_videos()
-    snaps = load_snapshots()
-
-    winners = get_winners(videos, snaps, req.threshold_vpd, req.top_k)
-    if not winners:
-        raise HTTPException(
-            status_code=400,
-            detail="No winners found (need >=2 snapshots per video). Run seed_scan again.",
-        )
-
-    intel = summarize_market(videos, winners)
-
-    # 2) Générer via OpenAI (V4)
-    plan = call_openai_v4(
-        intel=intel,
-        niche_fr=req.niche,
-        objective=req.objective,
-        ideas=req.ideas,
-        days=req.days,
-    )
+@app.post("/jobs/generate-plan")
+def submit_generate_plan(req: GeneratePlanRequest):
+    job_id, deduplicated = _submit_plan_job(req)
+    return {"job_id": job_id, "deduplicated": deduplicated, "status": job_status(job_id)["status"]}
 
-    # 3) Export files (V5)
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base = f"plan_{slug(req.niche)}_{slug(req.objective)}_{stamp}"
-    json_path = os.path.join("output", base + ".json")
-    md_path = os.path.join("output", base + ".md")
-    ui_path = os.path.join("output", base + "_ui.json")
-
-    write_json(json_path, plan)
-
-    md = render_markdown(plan)
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(md)
-
-    ui = compact_for_ui(plan)
-    write_json(ui_path, ui)
-
-    # 4) Insert DB
-    row = {
-        "created_at": datetime.now().isoformat(),
-        "niche": req.niche,
-        "objective": req.objective,
-        "threshold_vpd": req.threshold_vpd,
-        "top_k": req.top_k,
-        "ideas": req.ideas,
-        "days": req.days,
-        "plan_json_path": json_path,
-        "plan_md_path": md_path,
-        "plan_ui_json_path": ui_path,
-    }
-    plan_id = insert_plan(row)
 
-    # ✅ AJOUT: retourner le markdown directement pour l'afficher sur ton site
-    return {
-        "id": plan_id,
-        "markdown": md,
-        "meta": {
-            "niche": req.niche,
-            "objective": req.objective,
-            "ideas": req.ideas,
-            "days": req.days,
-        },
-        "files": {"json": json_path, "md": md_path, "ui": ui_path},
-    }
\ No newline at end of file
+@app.get("/jobs/{job_id}")
+def job(job_id: str):
+    st = job_status(job_id)
+    if not st:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return st
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result_endpoint(job_id: str):
+    st = job_status(job_id)
+    if not st:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if st["status"] == "failed":
+        raise _job_failure(st)
+    if st["status"] != "done":
+        return JSONResponse(status_code=202, content={"id": job_id, "status": st["status"]})
+    return job_result(job_id)
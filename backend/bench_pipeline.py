@@ -0,0 +1,415 @@
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows : pas de RSS max
+    resource = None
+
+from .core.lexicon import BLOCK_WORDS, BUSINESS_WHITELIST, FEARS
+
+# Benchmarks du pipeline analytique sur données synthétiques :
+#   load (SnapshotStore) -> winners (get_winners) -> fear radar (build_fear_radar)
+#   -> intel (summarize_market) -> rendu du plan (render_markdown + compact_for_ui).
+#
+#   python -m backend.bench_pipeline generate --rows 1M --cadence_h 6
+#   python -m backend.bench_pipeline run --sizes 10k,100k,1M,10M --cadence_h 6
+#   python -m backend.bench_pipeline compare base.json new.json --tolerance 0.15
+#
+# Chaque taille tourne dans un process séparé (RSS max propre à la taille).
+# Les jeux générés sont gardés dans data/bench/ (10M lignes ~ 1,2 Go) et
+# réutilisés tant que (rows, cadence, days, seed) ne change pas.
+
+BENCH_DIR = os.path.join("data", "bench")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+STAGES = ("load", "winners", "fear_radar", "intel", "render")
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+
+def size_label(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}M"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def dataset_dir(rows: int, cadence_h: float, days: float, seed: int) -> str:
+    return os.path.join(BENCH_DIR, f"rows_{size_label(rows)}_c{cadence_h:g}h_d{days:g}_s{seed}")
+
+
+# ----- génération -----
+
+_TEMPLATES = (
+    "How I grew my {biz} to {n}k/month with {biz2}",
+    "Why {fear} will destroy your {biz} in {n} months",
+    "{n} {biz} mistakes that make you {fear}",
+    "The truth about {biz} nobody tells you",
+    "Stop doing {biz2} if you want {biz} ({n} lessons)",
+    "I tried {biz} for {n} days - here is what happened",
+    "{fear}: the {biz} playbook for {n}",
+)
+_OFF_NICHE = (
+    "My {block} routine for {n} days",
+    "{n} {block} tips doctors don't share",
+)
+
+
+def _titles(rng: np.random.Generator, n: int, blocked_ratio: float) -> List[str]:
+    biz = sorted(BUSINESS_WHITELIST)
+    fear = sorted({kw for meta in FEARS.values() for kw in meta["keywords"]})
+    block = sorted(BLOCK_WORDS)
+    off = rng.random(n) < blocked_ratio
+    tpl = rng.integers(0, len(_TEMPLATES), n)
+    picks = rng.integers(0, 1 << 30, (n, 4))
+    out = []
+    for i in range(n):
+        a, b, c, d = picks[i]
+        if off[i]:
+            t = _OFF_NICHE[a % len(_OFF_NICHE)]
+        else:
+            t = _TEMPLATES[tpl[i]]
+        out.append(t.format(biz=biz[a % len(biz)], biz2=biz[b % len(biz)], fear=fear[c % len(fear)],
+                            block=block[d % len(block)], n=2 + d % 98))
+    return out
+
+
+def generate(out_dir: str, rows: int, cadence_h: float = 6.0, days: float = 14.0, seed: int = 42,
+             blocked_ratio: float = 0.1, missing_ratio: float = 0.03) -> Dict[str, Any]:
+    """
+    Écrit out_dir/videos.jsonl et out_dir/snapshots.jsonl (mêmes formats que storage.py).
+
+    Un scan toutes les cadence_h heures sur `days` jours ; chaque vidéo entre dans
+    le suivi à un scan aléatoire (découverte après publication) puis est relevée
+    à chaque scan (missing_ratio de relevés perdus). Vues : courbe saturante
+    V * (1 - exp(-âge / tau)), V log-normal (quelques très gros winners), tau de
+    quelques heures à plusieurs jours -> des vidéos qui explosent puis stagnent.
+    Lignes écrites dans l'ordre des scans, comme un vrai snapshots.jsonl.
+    """
+    rng = np.random.default_rng(seed)
+    ticks = max(2, int(days * 24 / cadence_h) + 1)
+    n_videos = max(1, math.ceil(rows / ((ticks + 2) / 2 * (1 - missing_ratio))))
+
+    entry = rng.integers(0, ticks - 1, n_videos)
+    age0 = rng.uniform(0.05, 3.0, n_videos)                 # jours depuis publication au 1er relevé
+    potential = rng.lognormal(math.log(20_000), 1.8, n_videos)
+    tau = rng.lognormal(math.log(2.0), 0.9, n_videos)       # jours
+    like_rate = rng.uniform(0.01, 0.05, n_videos)
+    comment_rate = rng.uniform(0.001, 0.005, n_videos)
+    offset_s = rng.integers(0, 900, n_videos)               # un scan prend du temps
+
+    start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=days)
+    ids = [f"syn{i:08d}" for i in range(n_videos)]
+
+    os.makedirs(out_dir, exist_ok=True)
+    titles = _titles(rng, n_videos, blocked_ratio)
+    with open(os.path.join(out_dir, "videos.jsonl"), "w", encoding="utf-8") as f:
+        for i in range(n_videos):
+            published = start + timedelta(hours=float(entry[i]) * cadence_h, days=-float(age0[i]))
+            published = published.replace(microsecond=0)
+            f.write(json.dumps({
+                "id": ids[i],
+                "title": titles[i],
+                "channel": f"channel_{int(offset_s[i]) % 400}",
+                "publishedAt": published.isoformat().replace("+00:00", "Z"),
+            }, ensure_ascii=False) + "\n")
+
+    last_views = np.zeros(n_videos, dtype=np.int64)
+    written = 0
+    with open(os.path.join(out_dir, "snapshots.jsonl"), "w", encoding="utf-8") as f:
+        for tick in range(ticks):
+            active = np.flatnonzero(entry <= tick)
+            if len(active) == 0:
+                continue
+            active = active[rng.random(len(active)) >= missing_ratio]
+            age = age0[active] + (tick - entry[active]) * cadence_h / 24
+            model = potential[active] * (1 - np.exp(-age / tau[active]))
+            views = np.maximum(last_views[active], (model * rng.normal(1.0, 0.002, len(active))).astype(np.int64))
+            last_views[active] = views
+            likes = (views * like_rate[active]).astype(np.int64)
+            comments = (views * comment_rate[active]).astype(np.int64)
+
+            base = start + timedelta(hours=tick * cadence_h)
+            stamps = {}
+            lines = []
+            for j, i in enumerate(active.tolist()):
+                o = int(offset_s[i])
+                ts = stamps.get(o)
+                if ts is None:
+                    ts = stamps[o] = (base + timedelta(seconds=o)).isoformat()
+                lines.append(
+                    f'{{"video_id": "{ids[i]}", "views": {views[j]}, "likes": {likes[j]}, '
+                    f'"comments": {comments[j]}, "timestamp": "{ts}"}}\n'
+                )
+            f.write("".join(lines))
+            written += len(lines)
+
+    meta = {"rows_target": rows, "rows": written, "videos": n_videos, "ticks": ticks, "cadence_h": cadence_h, "days": days, "seed": seed}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def ensure_dataset(rows: int, cadence_h: float, days: float, seed: int) -> Tuple[str, Dict[str, Any]]:
+    path = dataset_dir(rows, cadence_h, days, seed)
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            return path, json.load(f)
+    except FileNotFoundError:
+        t0 = time.perf_counter()
+        meta = generate(path, rows, cadence_h, days, seed)
+        print(f"[bench] generated {meta['rows']} rows / {meta['videos']} videos in {time.perf_counter() - t0:.1f}s -> {path}",
+              file=sys.stderr)
+        return path, meta
+
+
+# ----- mesures -----
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko ; macOS : octets
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _timed(fn: Callable[[], Any], repeat: int, reset: Callable[[], None]) -> Tuple[Any, List[float]]:
+    times, result = [], None
+    for _ in range(repeat):
+        reset()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, times
+
+
+def _stage(times: List[float], items: int, unit: str) -> Dict[str, Any]:
+    med = statistics.median(times)
+    return {
+        "seconds": round(med, 6),
+        "seconds_min": round(min(times), 6),
+        "seconds_cold": round(times[0], 6),
+        "items": items,
+        "unit": unit,
+        "per_s": round(items / med, 1) if med > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _synthetic_plan(intel: Dict[str, Any], ideas: int, days: int) -> Dict[str, Any]:
+    # schéma réel du prompt V4, dupliqué à la taille d'un plan généré
+    from .opportunity_v4 import build_prompt_v4
+
+    schema = build_prompt_v4(intel, "saas", "leads", ideas, days)[1]["output_schema_example"]
+    example = schema["opportunities"][0]
+    plan = dict(schema)
+    plan["opportunities"] = [dict(example, id=i + 1) for i in range(ideas)]
+    plan["calendar"] = [dict(schema["calendar"][0], day=d + 1, opportunity_id=d % ideas + 1) for d in range(days)]
+    return plan
+
+
+def run_one(data_dir: str, repeat: int = 3, threshold_vpd: int = 20000, top_k: int = 25,
+            ideas: int = 6, plan_days: int = 30, render_loops: int = 200) -> Dict[str, Any]:
+    """Toutes les étapes sur un jeu de données ; caches (métriques, titres) vidés à chaque mesure."""
+    from .snapshot_store import SnapshotStore
+    from .velocity import clear_metrics_cache
+    from .core import get_winners, LEX_MATCHER, FEAR_MATCHER
+    from .opportunity_mapper import build_fear_radar
+    from .opportunity_v4 import summarize_market
+    from .opportunity_v5 import render_markdown, compact_for_ui
+
+    with open(os.path.join(data_dir, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    rows = meta["rows"]
+
+    def reset():
+        clear_metrics_cache()
+        LEX_MATCHER.clear_cache()
+        FEAR_MATCHER.clear_cache()
+
+    def load():
+        store = SnapshotStore(os.path.join(data_dir, "videos.jsonl"), os.path.join(data_dir, "snapshots.jsonl"))
+        return store.videos(), store.snapshots()
+
+    stages: Dict[str, Any] = {}
+    (videos, snaps), t = _timed(load, repeat, reset)
+    stages["load"] = _stage(t, rows, "rows")
+
+    winners, t = _timed(lambda: get_winners(videos, snaps, threshold_vpd, top_k, rank_by="vpd"), repeat, reset)
+    stages["winners"] = _stage(t, rows, "rows")
+
+    ranked, t = _timed(lambda: build_fear_radar(videos, snaps), repeat, reset)
+    stages["fear_radar"] = _stage(t, rows, "rows")
+
+    intel, t = _timed(lambda: summarize_market(videos, winners), repeat, reset)
+    stages["intel"] = _stage(t, len(winners), "winners")
+
+    plan = _synthetic_plan(intel, ideas, plan_days)
+
+    def render():
+        for _ in range(render_loops):
+            render_markdown(plan)
+            compact_for_ui(plan)
+
+    _, t = _timed(render, repeat, lambda: None)
+    stages["render"] = _stage(t, render_loops, "plans")
+
+    return {
+        "size": size_label(meta.get("rows_target", rows)),
+        "rows": rows,
+        "videos": meta["videos"],
+        "cadence_h": meta["cadence_h"],
+        "days": meta["days"],
+        "winners": len(winners),
+        "fears": len(ranked),
+        "stages": stages,
+    }
+
+
+def _meta(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "threshold_vpd": args.threshold_vpd,
+        "top_k": args.top_k,
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    results = []
+    for size in args.sizes.split(","):
+        rows = parse_size(size)
+        path, _ = ensure_dataset(rows, args.cadence_h, args.days, args.seed)
+        cmd = [sys.executable, "-m", "backend.bench_pipeline", "run-one", "--data", path,
+               "--repeat", str(args.repeat), "--threshold_vpd", str(args.threshold_vpd), "--top_k", str(args.top_k)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"bench failed for {size}:\n{proc.stderr}")
+        res = json.loads(proc.stdout)
+        results.append(res)
+        print(_format(res), file=sys.stderr)
+    return {"meta": _meta(args), "results": results}
+
+
+def _format(res: Dict[str, Any]) -> str:
+    lines = [f"== {res['size']} rows ({res['videos']} videos, cadence {res['cadence_h']:g}h, {res['winners']} winners)"]
+    for name in STAGES:
+        st = res["stages"][name]
+        lines.append(f"  {name:<11} {st['seconds'] * 1000:>10.1f} ms  {st['per_s'] or 0:>14,.0f} {st['unit']}/s"
+                     f"  peak {st['peak_rss_mb']} MB")
+    return "\n".join(lines)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> List[str]:
+    """Retourne les régressions (temps médian > base * (1 + tolerance))."""
+    index = {(r["size"], r["cadence_h"]): r for r in base["results"]}
+    regressions = []
+    for r in new["results"]:
+        b = index.get((r["size"], r["cadence_h"]))
+        if b is None:
+            continue
+        for name in STAGES:
+            t0 = b["stages"][name]["seconds"]
+            t1 = r["stages"][name]["seconds"]
+            ratio = t1 / t0 if t0 > 0 else float("inf")
+            flag = "REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"{r['size']:>6} {name:<11} {t0 * 1000:>10.1f} ms -> {t1 * 1000:>10.1f} ms  x{ratio:.2f} {flag}")
+            if flag:
+                regressions.append(f"{r['size']}/{name}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline analytique (données synthétiques)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    def data_args(p):
+        p.add_argument("--cadence_h", type=float, default=6.0, help="heures entre deux scans")
+        p.add_argument("--days", type=float, default=14.0, help="durée couverte par les snapshots")
+        p.add_argument("--seed", type=int, default=42)
+
+    def bench_args(p):
+        p.add_argument("--repeat", type=int, default=3)
+        p.add_argument("--threshold_vpd", type=int, default=20000)
+        p.add_argument("--top_k", type=int, default=25)
+
+    g = sub.add_parser("generate", help="génère un jeu de données synthétique")
+    g.add_argument("--rows", default="100k")
+    g.add_argument("--out", default=None)
+    data_args(g)
+
+    r = sub.add_parser("run", help="génère si besoin puis mesure chaque taille")
+    r.add_argument("--sizes", default="10k,100k,1M")
+    r.add_argument("--out", default=None, help=f"défaut: {RESULTS_DIR}/pipeline_<date>.json")
+    data_args(r)
+    bench_args(r)
+
+    one = sub.add_parser("run-one", help="mesure un jeu de données (JSON sur stdout)")
+    one.add_argument("--data", required=True)
+    bench_args(one)
+
+    c = sub.add_parser("compare", help="compare deux fichiers de résultats")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--tolerance", type=float, default=0.15)
+
+    args = parser.parse_args()
+
+    if args.cmd == "generate":
+        rows = parse_size(args.rows)
+        out = args.out or dataset_dir(rows, args.cadence_h, args.days, args.seed)
+        t0 = time.perf_counter()
+        meta = generate(out, rows, args.cadence_h, args.days, args.seed)
+        print(f"{meta['rows']} rows / {meta['videos']} videos in {time.perf_counter() - t0:.1f}s -> {out}")
+
+    elif args.cmd == "run-one":
+        res = run_one(args.data, args.repeat, args.threshold_vpd, args.top_k)
+        print(json.dumps(res))
+
+    elif args.cmd == "run":
+        report = run(args)
+        out = args.out or os.path.join(RESULTS_DIR, f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved: {out}")
+
+    elif args.cmd == "compare":
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, "r", encoding="utf-8") as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import List
+
+# Cold start : lancement d'un process uvicorn neuf -> première réponse 200 sur /health.
+# Échoue (code 1) si la médiane dépasse le budget : à lancer avant de merger un
+# import lourd au niveau module (openai, googleapiclient, chargement des données...).
+#
+#   python -m backend.bench_startup                       # backend.api:app
+#   python -m backend.bench_startup --app main:app --runs 5 --budget 1.5
+
+STARTUP_BUDGET_S = float(os.getenv("STARTUP_BUDGET_S", "3.0"))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_cmd(app: str, port: int) -> List[str]:
+    return [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+
+
+def measure(app: str, timeout: float = 30.0) -> float:
+    """Secondes entre le lancement du process et le premier /health en 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(_server_cmd(app, port), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while True:
+            elapsed = time.perf_counter() - t0
+            if proc.poll() is not None:
+                err = proc.stderr.read().decode("utf-8", "replace")
+                raise RuntimeError(f"{app} exited with code {proc.returncode}:\n{err}")
+            if elapsed > timeout:
+                raise TimeoutError(f"{app}: no /health response after {timeout:.0f}s")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start -> premier /health")
+    parser.add_argument("--app", action="append", help="module:app (répétable), défaut backend.api:app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_S, help="secondes (médiane)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    ok = True
+    for app in args.app or ["backend.api:app"]:
+        times = [measure(app, args.timeout) for _ in range(args.runs)]
+        med = statistics.median(times)
+        status = "OK" if med <= args.budget else "OVER BUDGET"
+        ok = ok and med <= args.budget
+        print(f"{app}: median {med:.3f}s | min {min(times):.3f}s | max {max(times):.3f}s | budget {args.budget:.2f}s -> {status}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import shutil
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .storage import DATA_DIR, SNAPSHOT_FILE
+
+# Format colonnaire des snapshots (un dossier, un .npy par colonne) :
+#   ids.json        -> dictionnaire video_id (position = index vidéo)
+#   offsets.npy     -> int64[n_videos + 1], lignes de la vidéo i = [offsets[i], offsets[i+1])
+#   ts.npy          -> int64 epoch (microsecondes UTC)
+#   views.npy / likes.npy / comments.npy -> uint64
+# Les lignes sont triées par (vidéo, timestamp) : un group-by = un slice contigu.
+# Les .npy se lisent en mmap (np.load(mmap_mode="r")), aucun objet Python par ligne.
+
+COLUMNS_DIR = os.path.join(DATA_DIR, "snapshots_col")
+FORMAT_VERSION = 2  # v2: timestamps en microsecondes
+US_PER_DAY = 86400 * 1_000_000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def epoch_us(ts: str) -> int:
+    # Division entière sur timedelta : exact à la microseconde (pas de float)
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _US
+
+
+class SnapshotColumns:
+    def __init__(self, ids: List[str], offsets, ts, views, likes, comments):
+        self.ids = ids
+        self.index: Dict[str, int] = {vid: i for i, vid in enumerate(ids)}
+        self.offsets = offsets
+        self.ts = ts
+        self.views = views
+        self.likes = likes
+        self.comments = comments
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.offsets[-1]) if len(self.offsets) else 0
+
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def rows(self, video_id: str) -> Optional[slice]:
+        i = self.index.get(video_id)
+        if i is None:
+            return None
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+
+class ColumnBuffer:
+    """
+    Colonnes alimentées par lots (ordre d'ingestion) : chaque snapshot n'est
+    parsé (timestamp ISO -> epoch) qu'une fois, à son arrivée. columns() trie
+    (numpy) et mémoïse jusqu'au prochain extend.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._vidx = array("q")
+        self._ts = array("q")
+        self._views = array("Q")
+        self._likes = array("Q")
+        self._comments = array("Q")
+        self._cols: Optional[SnapshotColumns] = None
+
+    def extend(self, records) -> None:
+        ids, index = self.ids, self.index
+        for s in records:
+            vid = s["video_id"]
+            i = index.get(vid)
+            if i is None:
+                i = index[vid] = len(ids)
+                ids.append(vid)
+            self._vidx.append(i)
+            self._ts.append(epoch_us(s["timestamp"]))
+            self._views.append(max(0, int(s.get("views", 0))))
+            self._likes.append(max(0, int(s.get("likes", 0))))
+            self._comments.append(max(0, int(s.get("comments", 0))))
+        self._cols = None
+
+    def columns(self) -> SnapshotColumns:
+        if self._cols is None:
+            # copies : les arrays sources continuent de grossir
+            vidx_np = np.array(self._vidx, dtype=np.int64)
+            ts_np = np.array(self._ts, dtype=np.int64)
+            order = np.lexsort((ts_np, vidx_np))
+
+            offsets = np.zeros(len(self.ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(vidx_np, minlength=len(self.ids)), out=offsets[1:])
+
+            self._cols = SnapshotColumns(
+                ids=list(self.ids),
+                offsets=offsets,
+                ts=ts_np[order],
+                views=np.array(self._views, dtype=np.uint64)[order],
+                likes=np.array(self._likes, dtype=np.uint64)[order],
+                comments=np.array(self._comments, dtype=np.uint64)[order],
+            )
+        return self._cols
+
+
+def build_columns(records) -> SnapshotColumns:
+    """Construit les colonnes (en mémoire) depuis un itérable de snapshots dict."""
+    buf = ColumnBuffer()
+    buf.extend(records)
+    return buf.columns()
+
+
+def _iter_jsonl(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_columns(cols: SnapshotColumns, out_dir: str = COLUMNS_DIR) -> None:
+    # Écriture dans un dossier temporaire puis swap, pour ne jamais exposer un état partiel
+    tmp = out_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    with open(os.path.join(tmp, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": FORMAT_VERSION, "ids": cols.ids}, f, ensure_ascii=False)
+    np.save(os.path.join(tmp, "offsets.npy"), np.asarray(cols.offsets, dtype=np.int64))
+    np.save(os.path.join(tmp, "ts.npy"), np.asarray(cols.ts, dtype=np.int64))
+    np.save(os.path.join(tmp, "views.npy"), np.asarray(cols.views, dtype=np.uint64))
+    np.save(os.path.join(tmp, "likes.npy"), np.asarray(cols.likes, dtype=np.uint64))
+    np.save(os.path.join(tmp, "comments.npy"), np.asarray(cols.comments, dtype=np.uint64))
+
+    old = out_dir + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old)
+    os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def load_columns(path: str = COLUMNS_DIR, mmap: bool = True) -> Optional[SnapshotColumns]:
+    """Ouvre le format colonnaire (mmap par défaut). None si absent."""
+    meta_path = os.path.join(path, "ids.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise RuntimeError(f"Unsupported columnar format version: {meta.get('version')}")
+
+    mode = "r" if mmap else None
+    return SnapshotColumns(
+        ids=meta["ids"],
+        offsets=np.load(os.path.join(path, "offsets.npy"), mmap_mode=mode),
+        ts=np.load(os.path.join(path, "ts.npy"), mmap_mode=mode),
+        views=np.load(os.path.join(path, "views.npy"), mmap_mode=mode),
+        likes=np.load(os.path.join(path, "likes.npy"), mmap_mode=mode),
+        comments=np.load(os.path.join(path, "comments.npy"), mmap_mode=mode),
+    )
+
+
+def convert_jsonl(src: str = SNAPSHOT_FILE, out_dir: str = COLUMNS_DIR) -> SnapshotColumns:
+    """Conversion one-shot snapshots.jsonl -> format colonnaire."""
+    cols = build_columns(_iter_jsonl(src))
+    write_columns(cols, out_dir)
+    return cols
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--src", default=SNAPSHOT_FILE)
+    parser.add_argument("--out", default=COLUMNS_DIR)
+    args = parser.parse_args()
+
+    cols = convert_jsonl(args.src, args.out)
+    print(f"✅ {cols.n_rows} snapshots / {len(cols)} vidéos -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
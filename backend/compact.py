@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+from typing import Callable, Dict, List, Tuple
+
+from .storage import VIDEOS_FILE, SNAPSHOT_FILE, flush, fcntl, _catalog
+
+# Compaction des JSONL :
+# - videos.jsonl : une ligne par vidéo (fusion de l'historique, dernier état) ;
+# - snapshots.jsonl : doublons (video_id, timestamp) retirés, trié par timestamp.
+# Réécriture atomique (tmp + replace) sous flock : les writers (storage.JsonlWriter)
+# attendent le verrou puis rouvrent le nouveau fichier ; SnapshotStore voit le
+# changement d'inode et recharge.
+
+
+def _read_lines(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compact_videos(records: List[dict]) -> List[dict]:
+    latest: Dict[str, dict] = {}
+    for v in records:
+        old = latest.get(v["id"])
+        latest[v["id"]] = {**old, **v} if old is not None else v
+    return list(latest.values())
+
+
+def compact_snapshots(records: List[dict]) -> List[dict]:
+    unique: Dict[Tuple[str, str], dict] = {}
+    for s in records:
+        unique[(s["video_id"], s["timestamp"])] = s
+    return sorted(unique.values(), key=lambda s: s["timestamp"])
+
+
+def compact_file(path: str, compactor: Callable[[List[dict]], List[dict]]) -> Tuple[int, int, int, int]:
+    """Retourne (lignes avant, lignes après, octets avant, octets après)."""
+    if not os.path.exists(path):
+        return 0, 0, 0, 0
+
+    with open(path, "rb") as lock_f:
+        if fcntl is not None:
+            fcntl.flock(lock_f.fileno(), fcntl.LOCK_EX)
+        try:
+            size_before = os.path.getsize(path)
+            records = _read_lines(path)
+            kept = compactor(records)
+
+            tmp = path + ".compact.tmp"
+            with open(tmp, "w", encoding="utf-8") as out:
+                for r in kept:
+                    out.write(json.dumps(r, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, path)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_f.fileno(), fcntl.LOCK_UN)
+
+    return len(records), len(kept), size_before, os.path.getsize(path)
+
+
+def compact(videos: bool = True, snapshots: bool = True) -> Dict[str, Tuple[int, int, int, int]]:
+    flush()
+    out = {}
+    if videos:
+        out[VIDEOS_FILE] = compact_file(VIDEOS_FILE, compact_videos)
+        _catalog.invalidate()
+    if snapshots:
+        out[SNAPSHOT_FILE] = compact_file(SNAPSHOT_FILE, compact_snapshots)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réécrit les JSONL à leur dernier état")
+    parser.add_argument("--videos-only", action="store_true")
+    parser.add_argument("--snapshots-only", action="store_true")
+    args = parser.parse_args()
+
+    res = compact(videos=not args.snapshots_only, snapshots=not args.videos_only)
+    for path, (n0, n1, b0, b1) in res.items():
+        print(f"{path}: {n0} -> {n1} lignes | {b0} -> {b1} octets")
+
+
+if __name__ == "__main__":
+    main()
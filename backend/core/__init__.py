@@ -0,0 +1,11 @@
+# Noyau analytique partagé par tous les points d'entrée (API, CLIs, scans) :
+# lexiques, normalisation et filtres de titres, chargement des données, winners.
+# Rien de lourd ici : le SDK OpenAI et googleapiclient sont importés à l'usage.
+
+from .lexicon import BUSINESS_ONLY, BLOCK_WORDS, BUSINESS_WHITELIST, STOPWORDS, LEX, FEARS
+from .text import (
+    normalize_title, normalize_fear_title, tokenize,
+    LEX_MATCHER, FEAR_MATCHER,
+    is_blocked, is_business, keep_title, multi_labels, fear_primary, fear_scores,
+)
+from .data import RANK_BY, RANK_MODES, load_videos, load_snapshots, get_winners, views_per_day
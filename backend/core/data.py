@@ -0,0 +1,24 @@
+import os
+
+from ..snapshot_store import get_store
+from ..velocity import video_metrics, select_winners, views_per_day, RANK_MODES
+from .text import keep_title
+
+# Classement des winners : "vpd" (historique) ou vpd_24h / vpd_7d / vpd_30d / trend
+RANK_BY = os.getenv("WINNERS_RANK_BY", "vpd")
+
+
+def load_videos():
+    # Store partagé : chargé une fois, puis ingestion incrémentale des nouvelles lignes
+    return get_store().videos()
+
+
+def load_snapshots():
+    return get_store().snapshots()
+
+
+def get_winners(videos, snaps, threshold_vpd: int, top_k, rank_by: str = RANK_BY, keep=keep_title):
+    # snaps: dict du store ou format colonnaire (mmap) -> moteur vectorisé partagé
+    # rank_by: "vpd" (premier/dernier snapshot) ou fenêtre glissante / trend (cf. RANK_MODES)
+    metrics = video_metrics(snaps, rolling=rank_by != "vpd")
+    return select_winners(videos, metrics, threshold_vpd, top_k, keep=keep, by=rank_by)
@@ -0,0 +1,68 @@
+# Lexiques partagés (filtres business-only, leviers, taxonomie des peurs).
+
+BUSINESS_ONLY = True
+
+BLOCK_WORDS = {
+    "insulin","ozempic","keto","cancer","dementia","gut","fat","doctor","poo","health",
+    "diet","protein","workout","gym","calories","supplement","testosterone","hormone",
+    "sleep","adhd","anxiety","depression","autism","disease","symptom","blood","cholesterol",
+    "diabetes","weight","skin","hair","fasting","longevity","brain","neuroscience","dopamine",
+    "psychology","therapy",
+    "motivation","motivational","discipline","mindset","manifest","affirmation","affirmations",
+}
+
+BUSINESS_WHITELIST = {
+    "business","money","wealth","rich","profit","revenue","sales","marketing","startup",
+    "entrepreneur","entrepreneurship","agency","saas","copywriting","closing",
+    "real estate","investing","investor","stock","stocks","crypto","bitcoin","finance",
+    "valuation","deal","ecommerce","shopify","amazon","ads","advertising",
+    "ai","artificial intelligence","automation","agents","b2b","pricing","offer",
+    "funnel","funnels","lead","leads","clients","customer","customers"
+}
+
+STOPWORDS = {
+    "the","a","an","and","or","to","of","in","on","for","with","is","are","you","your","i","we","they","my",
+    "this","that","it","how","what","why","when","who","will","new","from","vs","as","at","by","be","do","does",
+    "these","those","should","only","before","after","into","out","than","about","over","under","up","down",
+}
+
+LEX = {
+    "money": {"money","wealth","rich","poor","income","cash","salary","profit","million","billion"},
+    "business": {"business","entrepreneur","entrepreneurship","startup","company","ceo","founder","operator"},
+    "sales": {"sales","sell","selling","closing","closer","deal","pipeline"},
+    "marketing": {"marketing","ads","advertising","copywriting","funnel","funnels","leads","clients","acquisition"},
+    "investing": {"investing","investor","stocks","stock","crypto","bitcoin","real","estate","valuation"},
+    "ai": {"ai","artificial","intelligence","automation","agents","jobs","future"},
+    "authority": {"expert","ceo","founder","investor","billionaire","professor","author"},
+    "contrarian": {"truth","myth","lie","wrong","stop","dont","don’t","shouldnt","shouldn’t","poorer"},
+    "urgency": {"now","before","warning","crash","collapse","months","years"},
+}
+
+# Taxonomie des peurs (fear radar / opportunity map)
+# Une vidéo peut matcher plusieurs peurs, mais on sort 1 "primary" (la plus forte)
+FEARS = {
+    "financial_decline": {
+        "label_fr": "Déclin financier (devenir pauvre / mauvaises décisions)",
+        "keywords": {"poor","poorer","broke","money","income","wealth","renting","house","invest","investing","crypto","smart investment","salary","profit","crash"}
+    },
+    "ai_obsolescence": {
+        "label_fr": "Obsolescence IA (perdre son job / devenir inutile)",
+        "keywords": {"ai","jobs","exist","automation","future","years","changes","won't exist","will not exist","robots"}
+    },
+    "business_failure": {
+        "label_fr": "Échec business (ton système est cassé)",
+        "keywords": {"business","startup","fail","failure","mistake","kills","dead","dying","bankrupt","lose","losing","revenue"}
+    },
+    "status_loss": {
+        "label_fr": "Perte de statut (être derrière / humilié)",
+        "keywords": {"top","best","secret","nobody","truth","wrong","stop","only","should"}
+    },
+    "relationship_break": {
+        "label_fr": "Rupture / divorce (perte relationnelle)",
+        "keywords": {"divorce","marriage","dating","relationship","breakup"}
+    },
+    "attention_decay": {
+        "label_fr": "Cerveau / attention détruite (dopamine, short-form)",
+        "keywords": {"dopamine","short","form","frying","addiction","brain","attention"}
+    },
+}
@@ -0,0 +1,54 @@
+import html
+import re
+
+from ..title_matcher import TitleMatcher, normalize_title as normalize_fear_title
+from .lexicon import BUSINESS_ONLY, BLOCK_WORDS, BUSINESS_WHITELIST, STOPWORDS, LEX, FEARS
+
+
+def normalize_title(title: str) -> str:
+    return html.unescape(title or "").lower().strip()
+
+
+def tokenize(title: str):
+    t = normalize_title(title)
+    t = re.sub(r"[^a-z0-9\s']", " ", t)
+    return [x for x in t.split() if x and x not in STOPWORDS and len(x) > 2]
+
+
+# Matchers compilés (une passe regex par titre + cache par hash de titre), partagés
+# par tous les modules : un titre classé par l'API ne l'est plus par le plan.
+# LEX_MATCHER : leviers (labels) ; FEAR_MATCHER : peurs (apostrophes normalisées).
+LEX_MATCHER = TitleMatcher(BLOCK_WORDS, BUSINESS_WHITELIST, lex=LEX, stopwords=STOPWORDS, normalize=normalize_title)
+FEAR_MATCHER = TitleMatcher(BLOCK_WORDS, BUSINESS_WHITELIST, fears=FEARS, stopwords=STOPWORDS, normalize=normalize_fear_title)
+
+
+def is_blocked(title: str) -> bool:
+    return LEX_MATCHER.classify(title).blocked
+
+
+def is_business(title: str) -> bool:
+    return LEX_MATCHER.classify(title).business
+
+
+def keep_title(title: str) -> bool:
+    info = LEX_MATCHER.classify(title)
+    if info.blocked:
+        return False
+    return not BUSINESS_ONLY or info.business
+
+
+def multi_labels(title: str):
+    return list(LEX_MATCHER.classify(title).labels)
+
+
+def fear_primary(title: str) -> str:
+    return FEAR_MATCHER.classify(title).fear_primary
+
+
+def fear_scores(title: str):
+    """
+    Retourne (primary_fear_key, scores_dict)
+    score = nb de keywords présents dans le titre (expression = 2 points)
+    """
+    info = FEAR_MATCHER.classify(title)
+    return info.fear_primary, dict(info.fear_scores)
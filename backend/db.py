@@ -1,79 +1,404 @@
+import json
 import os
 import sqlite3
+import threading
 from typing import Optional, List, Dict, Any
 
 DB_PATH = os.path.join("data", "plans.db")
 
-def _conn():
-    os.makedirs("data", exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+# Une connexion par thread (sqlite3 ne partage pas une connexion entre threads
+# sans verrou), gardée ouverte : plus d'open/close ni de makedirs par requête,
+# et le cache de statements préparés de sqlite3 (par connexion, clé = texte SQL)
+# sert enfin. Les requêtes sont des constantes de module pour que le texte
+# soit identique d'un appel à l'autre.
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_MS = 5000
+
+_local = threading.local()
+_dirs_ready = set()
+
+def _conn() -> sqlite3.Connection:
+    key = (DB_PATH, os.getpid())   # pas de connexion héritée d'un fork
+    con = getattr(_local, "con", None)
+    if con is not None and _local.key == key:
+        return con
+
+    d = os.path.dirname(DB_PATH) or "."
+    if d not in _dirs_ready:
+        os.makedirs(d, exist_ok=True)
+        _dirs_ready.add(d)
+    con = sqlite3.connect(DB_PATH, cached_statements=STATEMENT_CACHE_SIZE, timeout=BUSY_TIMEOUT_MS / 1000)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    _local.con, _local.key = con, key
+    return con
+
+def close_thread_conn() -> None:
+    con = getattr(_local, "con", None)
+    if con is not None:
+        con.close()
+        _local.con = None
 
 def init_db():
     con = _conn()
-    cur = con.cursor()
+    with con:
+        cur = con.cursor()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            niche TEXT NOT NULL,
+            objective TEXT NOT NULL,
+            threshold_vpd INTEGER NOT NULL,
+            top_k INTEGER NOT NULL,
+            ideas INTEGER NOT NULL,
+            days INTEGER NOT NULL,
+            plan_json_path TEXT NOT NULL,
+            plan_md_path TEXT NOT NULL,
+            plan_ui_json_path TEXT NOT NULL
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_plans_niche_obj ON plans(niche, objective)")
+        _init_plan_listing(cur)
+        _init_plan_blob(cur)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            dedupe_key TEXT NOT NULL,
+            params_json TEXT NOT NULL,
+            result_json TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        _init_timeseries(cur)
+
+_timeseries_ready = False
+
+def ensure_timeseries() -> None:
+    """Crée les tables videos/snapshots si besoin (writers hors API, ex: seed_scan)."""
+    global _timeseries_ready
+    if not _timeseries_ready:
+        con = _conn()
+        with con:
+            _init_timeseries(con.cursor())
+        _timeseries_ready = True
+
+def _init_timeseries(cur) -> None:
     cur.execute("""
-    CREATE TABLE IF NOT EXISTS plans (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        created_at TEXT NOT NULL,
+    CREATE TABLE IF NOT EXISTS videos (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        channel TEXT,
+        published_at TEXT,
+        record_json TEXT NOT NULL
+    ) WITHOUT ROWID
+    """)
+    # PK (video_id, timestamp) = index clusterisé : premier/dernier point d'une
+    # vidéo = une descente d'index, et la ligne entière est dans l'index.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS snapshots (
+        video_id TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        views INTEGER NOT NULL,
+        likes INTEGER NOT NULL,
+        comments INTEGER NOT NULL,
+        PRIMARY KEY (video_id, timestamp)
+    ) WITHOUT ROWID
+    """)
+    # fenêtre temporelle globale sans toucher la table
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots(timestamp, video_id, views)")
+
+def _init_plan_blob(cur) -> None:
+    # Plan canonique compressé en ligne (PLAN_STORAGE=inline, cf. plan_store.py)
+    cols = {r[1] for r in cur.execute("PRAGMA table_info(plans)").fetchall()}
+    if "plan_blob" not in cols:
+        cur.execute("ALTER TABLE plans ADD COLUMN plan_blob BLOB")
+    if "plan_codec" not in cols:
+        cur.execute("ALTER TABLE plans ADD COLUMN plan_codec TEXT")
+
+def _init_plan_listing(cur) -> None:
+    # Index (x) = (x, id) implicitement : filtre + keyset sur id sans tri
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_plans_niche ON plans(niche)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_plans_objective ON plans(objective)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_plans_created ON plans(created_at)")
+
+    # Compteurs maintenus par triggers : total = somme de quelques lignes, pas COUNT(*)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS plan_counts (
         niche TEXT NOT NULL,
         objective TEXT NOT NULL,
-        threshold_vpd INTEGER NOT NULL,
-        top_k INTEGER NOT NULL,
-        ideas INTEGER NOT NULL,
-        days INTEGER NOT NULL,
-        plan_json_path TEXT NOT NULL,
-        plan_md_path TEXT NOT NULL,
-        plan_ui_json_path TEXT NOT NULL
-    )
+        n INTEGER NOT NULL,
+        PRIMARY KEY (niche, objective)
+    ) WITHOUT ROWID
     """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_plans_niche_obj ON plans(niche, objective)")
-    con.commit()
-    con.close()
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_plans_count_ins AFTER INSERT ON plans BEGIN
+        INSERT INTO plan_counts (niche, objective, n) VALUES (NEW.niche, NEW.objective, 1)
+        ON CONFLICT(niche, objective) DO UPDATE SET n = n + 1;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_plans_count_del AFTER DELETE ON plans BEGIN
+        UPDATE plan_counts SET n = n - 1 WHERE niche = OLD.niche AND objective = OLD.objective;
+    END
+    """)
+    # migration : plans créés avant les compteurs
+    if cur.execute("SELECT 1 FROM plan_counts LIMIT 1").fetchone() is None:
+        cur.execute("""
+        INSERT INTO plan_counts (niche, objective, n)
+        SELECT niche, objective, COUNT(*) FROM plans GROUP BY niche, objective
+        """)
+
+_INSERT_PLAN_SQL = """
+INSERT INTO plans (
+    created_at, niche, objective, threshold_vpd, top_k, ideas, days,
+    plan_json_path, plan_md_path, plan_ui_json_path, plan_blob, plan_codec
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _plan_params(row: Dict[str, Any]):
+    # plans inline : chemins vides, contenu dans plan_blob
+    return (
+        row["created_at"], row["niche"], row["objective"], row["threshold_vpd"], row["top_k"], row["ideas"], row["days"],
+        row.get("plan_json_path", ""), row.get("plan_md_path", ""), row.get("plan_ui_json_path", ""),
+        row.get("plan_blob"), row.get("plan_codec"),
+    )
 
 def insert_plan(row: Dict[str, Any]) -> int:
     con = _conn()
-    cur = con.cursor()
-    cur.execute("""
-    INSERT INTO plans (
-        created_at, niche, objective, threshold_vpd, top_k, ideas, days,
-        plan_json_path, plan_md_path, plan_ui_json_path
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        row["created_at"], row["niche"], row["objective"], row["threshold_vpd"], row["top_k"], row["ideas"], row["days"],
-        row["plan_json_path"], row["plan_md_path"], row["plan_ui_json_path"]
-    ))
-    con.commit()
-    plan_id = cur.lastrowid
-    con.close()
-    return plan_id
-
-def list_plans(limit: int = 20) -> List[Dict[str, Any]]:
+    with con:
+        return con.execute(_INSERT_PLAN_SQL, _plan_params(row)).lastrowid
+
+def insert_plans(rows: List[Dict[str, Any]]) -> List[int]:
+    """Insertion en masse (backfill) : une seule transaction, statement préparé une fois."""
     con = _conn()
-    cur = con.cursor()
-    cur.execute("""
-    SELECT id, created_at, niche, objective, threshold_vpd, top_k, ideas, days,
-           plan_json_path, plan_md_path, plan_ui_json_path
-    FROM plans
-    ORDER BY id DESC
-    LIMIT ?
-    """, (limit,))
-    rows = cur.fetchall()
-    con.close()
-    keys = ["id","created_at","niche","objective","threshold_vpd","top_k","ideas","days","plan_json_path","plan_md_path","plan_ui_json_path"]
-    return [dict(zip(keys, r)) for r in rows]
+    with con:
+        cur = con.cursor()
+        ids = []
+        for row in rows:
+            cur.execute(_INSERT_PLAN_SQL, _plan_params(row))
+            ids.append(cur.lastrowid)
+    return ids
+
+_PLAN_COLUMNS = """id, created_at, niche, objective, threshold_vpd, top_k, ideas, days,
+       plan_json_path, plan_md_path, plan_ui_json_path, plan_codec"""
+
+def list_plans(
+    limit: int = 20,
+    before_id: Optional[int] = None,
+    niche: Optional[str] = None,
+    objective: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Pagination keyset : page suivante avec before_id = id de la dernière ligne
+    reçue. Coût constant quel que soit le nombre de plans.
+    Sans plage de dates : ordre id DESC. Avec plage : filtre sur created_at
+    lui-même (created_at ne suit pas id : backfill insert_plans, heure locale),
+    ordre (created_at, id) DESC le long de idx_plans_created.
+    Une date seule (YYYY-MM-DD) en borne haute inclut toute la journée.
+    """
+    con = _conn()
+    where, params = [], []
+    if niche is not None:
+        where.append("niche = ?")
+        params.append(niche)
+    if objective is not None:
+        where.append("objective = ?")
+        params.append(objective)
+
+    dated = bool(created_from or created_to)
+    if created_from:
+        where.append("created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        if len(created_to) == 10:
+            created_to += "T23:59:59.999999"
+        where.append("created_at <= ?")
+        params.append(created_to)
+
+    if before_id is not None:
+        if dated:
+            # curseur (created_at, id) : created_at du dernier plan reçu (descente de PK)
+            r = con.execute("SELECT created_at FROM plans WHERE id = ?", (before_id,)).fetchone()
+            if r is None:
+                return []
+            where.append("(created_at, id) < (?, ?)")
+            params.extend((r["created_at"], before_id))
+        else:
+            where.append("id < ?")
+            params.append(before_id)
+
+    sql = f"SELECT {_PLAN_COLUMNS} FROM plans"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?" if dated else " ORDER BY id DESC LIMIT ?"
+    rows = con.execute(sql, (*params, limit)).fetchall()
+    return [dict(r) for r in rows]
+
+def count_plans(niche: Optional[str] = None, objective: Optional[str] = None) -> int:
+    where, params = [], []
+    if niche is not None:
+        where.append("niche = ?")
+        params.append(niche)
+    if objective is not None:
+        where.append("objective = ?")
+        params.append(objective)
+    sql = "SELECT COALESCE(SUM(n), 0) AS n FROM plan_counts"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return _conn().execute(sql, params).fetchone()["n"]
+
+_GET_PLAN_SQL = f"SELECT {_PLAN_COLUMNS} FROM plans WHERE id = ?"
+_PLAN_EXISTS_SQL = "SELECT 1 FROM plans WHERE id = ?"
+
+def plan_exists(plan_id: int) -> bool:
+    # lookup sur la clé primaire, sans lire les colonnes
+    return _conn().execute(_PLAN_EXISTS_SQL, (plan_id,)).fetchone() is not None
 
 def get_plan(plan_id: int) -> Optional[Dict[str, Any]]:
+    r = _conn().execute(_GET_PLAN_SQL, (plan_id,)).fetchone()
+    if not r:
+        return None
+    return dict(r)
+
+_GET_PLAN_BLOB_SQL = f"SELECT {_PLAN_COLUMNS}, plan_blob FROM plans WHERE id = ?"
+
+def get_plan_with_blob(plan_id: int) -> Optional[Dict[str, Any]]:
+    """Comme get_plan + plan_blob (une seule lecture de ligne pour le contenu)."""
+    r = _conn().execute(_GET_PLAN_BLOB_SQL, (plan_id,)).fetchone()
+    if not r:
+        return None
+    return dict(r)
+
+def insert_job(row: Dict[str, Any]) -> None:
     con = _conn()
-    cur = con.cursor()
-    cur.execute("""
-    SELECT id, created_at, niche, objective, threshold_vpd, top_k, ideas, days,
-           plan_json_path, plan_md_path, plan_ui_json_path
-    FROM plans
+    with con:
+        con.execute("""
+        INSERT INTO jobs (id, kind, status, dedupe_key, params_json, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            row["id"], row["kind"], row["status"], row["dedupe_key"], row["params_json"],
+            row["created_at"], row["updated_at"]
+        ))
+
+def update_job(job_id: str, status: str, updated_at: str, result_json: Optional[str] = None, error: Optional[str] = None) -> None:
+    con = _conn()
+    with con:
+        con.execute("""
+        UPDATE jobs SET status = ?, updated_at = ?, result_json = ?, error = ?
+        WHERE id = ?
+        """, (status, updated_at, result_json, error, job_id))
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    r = _conn().execute("""
+    SELECT id, kind, status, dedupe_key, params_json, result_json, error, created_at, updated_at
+    FROM jobs
     WHERE id = ?
-    """, (plan_id,))
-    r = cur.fetchone()
-    con.close()
+    """, (job_id,)).fetchone()
     if not r:
         return None
-    keys = ["id","created_at","niche","objective","threshold_vpd","top_k","ideas","days","plan_json_path","plan_md_path","plan_ui_json_path"]
-    return dict(zip(keys, r))
\ No newline at end of file
+    return dict(r)
+
+def list_jobs_by_status(statuses: List[str]) -> List[Dict[str, Any]]:
+    marks = ",".join("?" for _ in statuses)
+    rows = _conn().execute(f"""
+    SELECT id, kind, status, dedupe_key, params_json, result_json, error, created_at, updated_at
+    FROM jobs
+    WHERE status IN ({marks})
+    ORDER BY created_at
+    """, tuple(statuses)).fetchall()
+    return [dict(r) for r in rows]
+
+# ----- séries temporelles (videos / snapshots) -----
+# Timestamps ISO 8601 UTC (storage.save_snapshot) : l'ordre texte = l'ordre chronologique.
+
+def upsert_videos(records: List[Dict[str, Any]]) -> None:
+    con = _conn()
+    with con:
+        con.executemany("""
+        INSERT INTO videos (id, title, channel, published_at, record_json)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            title = excluded.title,
+            channel = excluded.channel,
+            published_at = excluded.published_at,
+            record_json = excluded.record_json
+        """, [
+            (v["id"], v.get("title"), v.get("channel"), v.get("publishedAt"), json.dumps(v, ensure_ascii=False))
+            for v in records
+        ])
+
+def insert_snapshots(records: List[Dict[str, Any]]) -> None:
+    con = _conn()
+    with con:
+        con.executemany("""
+        INSERT OR IGNORE INTO snapshots (video_id, timestamp, views, likes, comments)
+        VALUES (?, ?, ?, ?, ?)
+        """, [
+            (s["video_id"], s["timestamp"], int(s.get("views", 0)), int(s.get("likes", 0)), int(s.get("comments", 0)))
+            for s in records
+        ])
+
+def iter_videos():
+    for r in _conn().execute("SELECT record_json FROM videos"):
+        yield json.loads(r["record_json"])
+
+def iter_snapshots():
+    for r in _conn().execute("""
+    SELECT video_id, views, likes, comments, timestamp
+    FROM snapshots
+    ORDER BY timestamp
+    """):
+        yield dict(r)
+
+# Premier / dernier snapshot de chaque vidéo dans [start, end] : deux descentes
+# de la PK par vidéo (pas de scan ni de GROUP BY sur snapshots).
+_WINDOW_SQL = """
+WITH bounds AS MATERIALIZED (
+    SELECT v.id AS video_id,
+        (SELECT s.timestamp FROM snapshots s
+         WHERE s.video_id = v.id AND s.timestamp >= :start AND s.timestamp <= :end
+         ORDER BY s.timestamp ASC LIMIT 1) AS first_ts,
+        (SELECT s.timestamp FROM snapshots s
+         WHERE s.video_id = v.id AND s.timestamp >= :start AND s.timestamp <= :end
+         ORDER BY s.timestamp DESC LIMIT 1) AS last_ts
+    FROM videos v
+),
+pairs AS (
+    SELECT b.video_id, b.first_ts, f.views AS first_views, b.last_ts, l.views AS last_views,
+           MAX(1e-6, julianday(b.last_ts) - julianday(b.first_ts)) AS days
+    FROM bounds b
+    JOIN snapshots f ON f.video_id = b.video_id AND f.timestamp = b.first_ts
+    JOIN snapshots l ON l.video_id = b.video_id AND l.timestamp = b.last_ts
+    WHERE b.last_ts > b.first_ts
+)
+SELECT video_id, first_ts, first_views, last_ts, last_views, days,
+       (last_views - first_views) / days AS views_per_day
+FROM pairs
+"""
+
+_ABOVE_VPD_SQL = (
+    "SELECT * FROM (" + _WINDOW_SQL + ") WHERE views_per_day >= :min_vpd "
+    "ORDER BY views_per_day DESC LIMIT :limit"
+)
+
+def snapshot_window(start: str = "", end: str = "9999") -> List[Dict[str, Any]]:
+    """Vidéos avec >= 2 snapshots dans la fenêtre : premier/dernier point + vpd."""
+    rows = _conn().execute(_WINDOW_SQL, {"start": start, "end": end}).fetchall()
+    return [dict(r) for r in rows]
+
+def videos_above_vpd(min_vpd: float, start: str = "", end: str = "9999", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    rows = _conn().execute(
+        _ABOVE_VPD_SQL,
+        {"start": start, "end": end, "min_vpd": min_vpd, "limit": -1 if limit is None else limit},
+    ).fetchall()
+    return [dict(r) for r in rows]
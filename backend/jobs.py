@@ -0,0 +1,151 @@
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .db import insert_job, update_job, get_job, list_jobs_by_status
+from .plan_service import generate_plan
+
+# Jobs de génération : soumission immédiate (job id), exécution dans un pool
+# borné, état persisté dans data/plans.db (table jobs) pour survivre à un restart.
+#
+# Statuts : queued -> running -> done | failed
+
+JOB_CONCURRENCY = int(os.getenv("PLAN_JOB_CONCURRENCY", "2"))
+JOB_MAX_PENDING = int(os.getenv("PLAN_JOB_MAX_PENDING", "50"))
+
+RUNNERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "generate_plan": generate_plan,
+}
+
+ACTIVE_STATUSES = ["queued", "running"]
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def dedupe_key(kind: str, params: Dict[str, Any]) -> str:
+    # Par niche : deux requêtes identiques en vol partagent le même job
+    h = hashlib.sha1(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{kind}:{params.get('niche', '')}:{h}"
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class JobManager:
+    def __init__(self, max_workers: int = JOB_CONCURRENCY, max_pending: int = JOB_MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-job")
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, str] = {}      # dedupe_key -> job_id
+        self._futures: Dict[str, Future] = {}    # job_id -> Future (jobs en vol uniquement)
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Tuple[str, bool]:
+        """Retourne (job_id, deduplicated)."""
+        if kind not in RUNNERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        key = dedupe_key(kind, params)
+
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id is not None:
+                return job_id, True
+            if len(self._futures) >= self.max_pending:
+                raise QueueFullError("Too many pending jobs")
+
+            job_id = uuid.uuid4().hex
+            now = _now()
+            insert_job({
+                "id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "dedupe_key": key,
+                "params_json": json.dumps(params, ensure_ascii=False),
+                "created_at": now,
+                "updated_at": now,
+            })
+            self._start(job_id, kind, key, params)
+            return job_id, False
+
+    def _start(self, job_id: str, kind: str, key: str, params: Dict[str, Any]) -> None:
+        # appelé sous self._lock
+        self._inflight[key] = job_id
+        # contexte copié : les spans du job remontent dans le Server-Timing de la requête appelante
+        ctx = contextvars.copy_context()
+        self._futures[job_id] = self._executor.submit(ctx.run, self._run, job_id, kind, key, params)
+
+    def _run(self, job_id: str, kind: str, key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        update_job(job_id, "running", _now())
+        try:
+            result = RUNNERS[kind](params)
+        except Exception as e:
+            traceback.print_exc()
+            update_job(job_id, "failed", _now(), error=f"{type(e).__name__}: {e}")
+            raise
+        else:
+            update_job(job_id, "done", _now(), result_json=json.dumps(result, ensure_ascii=False))
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._futures.pop(job_id, None)
+
+    def future(self, job_id: str) -> Optional[Future]:
+        with self._lock:
+            return self._futures.get(job_id)
+
+    def resume_pending(self) -> int:
+        """Relance les jobs queued/running trouvés en DB (process précédent arrêté en cours de route)."""
+        n = 0
+        with self._lock:
+            for row in list_jobs_by_status(ACTIVE_STATUSES):
+                if row["id"] in self._futures:
+                    continue
+                update_job(row["id"], "queued", _now())
+                self._start(row["id"], row["kind"], row["dedupe_key"], json.loads(row["params_json"]))
+                n += 1
+        return n
+
+
+def job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    row = get_job(job_id)
+    if not row:
+        return None
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "params": json.loads(row["params_json"]),
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def job_result(job_id: str) -> Optional[Dict[str, Any]]:
+    row = get_job(job_id)
+    if not row or row["result_json"] is None:
+        return None
+    return json.loads(row["result_json"])
+
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = JobManager()
+    return _MANAGER
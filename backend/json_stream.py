@@ -0,0 +1,114 @@
+import json
+from typing import Any, Iterable, List, Tuple
+
+# Parse incrémental d'un objet JSON reçu token par token.
+# On ne reconstruit pas l'arbre : on suit seulement la structure (pile de
+# conteneurs, chaînes, échappements) et on découpe les éléments complets des
+# tableaux de premier niveau qui nous intéressent (ex: opportunities[i]).
+
+
+class JsonArrayStreamer:
+    """
+    feed(chunk) -> [(key, index, item)] pour chaque élément terminé de
+    root[key][index], key dans `keys`. Le texte avant le premier '{' (prose,
+    ```json) est ignoré. `text` contient tout ce qui a été reçu.
+
+    Seul le morceau encore utile (élément en cours) est gardé dans le buffer
+    de travail : chaque feed coûte O(taille du chunk + élément en cours).
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self._chunks: List[str] = []
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._stack: List[str] = []
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._expect_key = False
+        self._key = None          # dernière clé vue au niveau racine
+        self._tracked = None      # clé du tableau racine en cours de découpe
+        self._item_start = None
+        self._counts = {}
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Tuple[str, int, Any]]:
+        self._chunks.append(chunk)
+        out = []
+        text = self._buf = self._buf + chunk
+        i = self._pos
+        n = len(text)
+        stack = self._stack
+
+        while i < n and not self._done:
+            c = text[i]
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._expect_key and len(stack) == 1:
+                        self._key = json.loads(text[self._str_start:i + 1])
+                i += 1
+                continue
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    stack.append("{")
+                    self._expect_key = True
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_str = True
+                self._str_start = i
+            elif c == ":":
+                self._expect_key = False
+            elif c == ",":
+                self._expect_key = stack[-1] == "{"
+            elif c in "{[":
+                if (c == "{" and self._tracked is not None and len(stack) == 2):
+                    self._item_start = i
+                if c == "[" and len(stack) == 1:
+                    self._tracked = self._key if self._key in self.keys else None
+                stack.append(c)
+                self._expect_key = c == "{"
+            elif c in "}]":
+                stack.pop()
+                self._expect_key = False
+                if c == "}" and len(stack) == 2 and self._item_start is not None:
+                    key = self._tracked
+                    idx = self._counts.get(key, 0)
+                    self._counts[key] = idx + 1
+                    out.append((key, idx, json.loads(text[self._item_start:i + 1])))
+                    self._item_start = None
+                elif c == "]" and len(stack) == 1:
+                    self._tracked = None
+                elif not stack:
+                    self._done = True
+            i += 1
+
+        # on jette ce qui est déjà consommé (indices rebasés)
+        keep = i
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_str:
+            keep = min(keep, self._str_start)
+        if keep:
+            self._buf = text[keep:]
+            if self._item_start is not None:
+                self._item_start -= keep
+            self._str_start -= keep
+            i -= keep
+        self._pos = i
+        return out
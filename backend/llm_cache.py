@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Cache persistant des réponses OpenAI (texte brut), adressé par contenu :
+# clé = sha256 du JSON canonique {model, system, user}. TTL + éviction LRU.
+# openai_completion : appel modèle principal / fallback commun aux opportunity_v*.
+# Les mêmes (intel, niche, objective, ideas, days) -> pas de nouvel appel payant.
+
+CACHE_PATH = os.path.join("data", "llm_cache.db")
+CACHE_TTL_S = int(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+
+BUSY_TIMEOUT_MS = 5000
+
+# Le cache est indexé par le modèle qui a réellement répondu : une réponse du
+# fallback n'est jamais servie comme venant du modèle principal.
+PRIMARY_MODEL = "gpt-4.1-mini"
+FALLBACK_MODEL = "gpt-4o-mini"
+
+# Une connexion par thread gardée ouverte, en WAL (même approche que backend/db.py)
+_local = threading.local()
+_ready = set()   # chemins dont le schéma est créé
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "bypass": 0, "expired": 0, "evicted": 0}
+
+
+def cache_key(model: str, system: str, user_json: Dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {"model": model, "system": system, "user": user_json},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _bump(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _conn() -> sqlite3.Connection:
+    key = (CACHE_PATH, os.getpid())   # pas de connexion héritée d'un fork
+    con = getattr(_local, "con", None)
+    if con is not None and _local.key == key:
+        return con
+
+    os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+    con = sqlite3.connect(CACHE_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    if CACHE_PATH not in _ready:
+        with con:
+            con.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache(last_used_at)")
+        _ready.add(CACHE_PATH)
+    _local.con, _local.key = con, key
+    return con
+
+
+def _get(key: str):
+    con = _conn()
+    r = con.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+    if not r:
+        return None
+    response, created_at = r
+    now = time.time()
+    with con:
+        if now - created_at > CACHE_TTL_S:
+            con.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            _bump("expired")
+            return None
+        con.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+    return response
+
+
+def _put(key: str, model: str, response: str) -> None:
+    con = _conn()
+    now = time.time()
+    with con:
+        con.execute("""
+        INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?)
+        """, (key, model, response, now, now))
+        # LRU : on garde les CACHE_MAX_ENTRIES plus récemment utilisées
+        cur = con.execute("""
+        DELETE FROM llm_cache WHERE key IN (
+            SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+        )
+        """, (CACHE_MAX_ENTRIES,))
+    if cur.rowcount > 0:
+        with _stats_lock:
+            _stats["evicted"] += cur.rowcount
+
+
+def lookup(model: str, system: str, user_json: Dict[str, Any]) -> Optional[str]:
+    """Réponse en cache (non expirée) ou None. Compte hit/miss."""
+    if not CACHE_ENABLED:
+        return None
+    hit = _get(cache_key(model, system, user_json))
+    _bump("hits" if hit is not None else "misses")
+    return hit
+
+
+def store(model: str, system: str, user_json: Dict[str, Any], response: str) -> None:
+    if CACHE_ENABLED:
+        _put(cache_key(model, system, user_json), model, response)
+
+
+def cached_completion(model: str, system: str, user_json: Dict[str, Any], call: Callable[[], str],
+                      force: bool = False, parse: Optional[Callable[[str], Any]] = None):
+    """
+    Retourne la réponse en cache si présente (et non expirée), sinon call() puis stocke.
+    force=True : ignore le cache en lecture (mais rafraîchit l'entrée).
+    parse : si fourni, retourne parse(texte) et ne stocke que si le parse réussit
+    (une réponse tronquée / invalide n'est jamais rejouée).
+    """
+    if not CACHE_ENABLED:
+        text = call()
+        return parse(text) if parse is not None else text
+
+    if force:
+        _bump("bypass")
+    else:
+        hit = lookup(model, system, user_json)
+        if hit is not None:
+            if parse is None:
+                return hit
+            try:
+                return parse(hit)
+            except Exception:
+                pass   # entrée invalide (antérieure à la validation) : rappel, puis écrasée
+
+    text = call()
+    value = parse(text) if parse is not None else text
+    store(model, system, user_json, text)
+    return value
+
+
+class _PrimaryUnavailable(Exception):
+    pass
+
+
+def parse_plan_text(text: str) -> dict:
+    """JSON du modèle ; s'il a ajouté du texte autour, le premier objet JSON."""
+    try:
+        return json.loads(text)
+    except Exception:
+        m = re.search(r"\{.*\}", text, re.DOTALL)
+        if not m:
+            raise RuntimeError("Model did not return JSON.")
+        return json.loads(m.group(0))
+
+
+def openai_completion(api_key: str, system: str, user_json: Dict[str, Any],
+                      parse: Callable[[str], Any] = parse_plan_text, force: bool = False):
+    """
+    Nouveau SDK OpenAI (PRIMARY_MODEL), sinon SDK legacy (FALLBACK_MODEL), via le cache.
+    Retourne parse(texte) ; le texte n'est mis en cache que si parse réussit.
+    """
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": json.dumps(user_json, ensure_ascii=False)}
+    ]
+
+    def call_primary() -> str:
+        try:
+            from openai import OpenAI
+            client = OpenAI(api_key=api_key)
+            resp = client.responses.create(model=PRIMARY_MODEL, input=messages)
+            return resp.output_text
+        except Exception as e:
+            raise _PrimaryUnavailable() from e
+
+    def call_fallback() -> str:
+        import openai
+        openai.api_key = api_key
+        resp = openai.ChatCompletion.create(model=FALLBACK_MODEL, messages=messages, temperature=0.6)
+        return resp["choices"][0]["message"]["content"]
+
+    try:
+        return cached_completion(PRIMARY_MODEL, system, user_json, call_primary, force=force, parse=parse)
+    except _PrimaryUnavailable:
+        return cached_completion(FALLBACK_MODEL, system, user_json, call_fallback, force=force, parse=parse)
+
+
+def cache_stats() -> Dict[str, Any]:
+    entries = _conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    with _stats_lock:
+        return dict(_stats, entries=entries, ttl_s=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES)
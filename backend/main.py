@@ -7,8 +7,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from backend.youtube import search_youtube
-from backend.market import analyze_market
+from backend.search_cache import search_and_analyze
+from backend.timing import install as install_timing
 
 app = FastAPI(title="LeadVision API")
 
@@ -21,6 +21,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing + GET /metrics
+install_timing(app)
+
 @app.get("/")
 def root():
     return {"status": "ok"}
@@ -31,8 +34,7 @@ def health():
 
 @app.get("/run-agent")
 def run_agent(query: str = "alex hormozi"):
-    videos = search_youtube(query, max_results=25)
-    results = analyze_market(videos)
+    videos, results = search_and_analyze(query, max_results=25)
     return {
         "query": query,
         "videos_found": len(videos),
@@ -48,8 +50,7 @@ def generate(payload: dict):
         raise HTTPException(status_code=400, detail="Missing query")
 
     try:
-        videos = search_youtube(query, max_results=max_results)
-        results = analyze_market(videos)
+        videos, results = search_and_analyze(query, max_results=max_results)
         return {
             "query": query,
             "videos_count": len(videos),
@@ -1,31 +1,25 @@
-from googleapiclient.discovery import build
-import os
+from backend.youtube import get_videos
 
-def analyze_market(videos):
-    api_key = os.getenv("YOUTUBE_API_KEY")
-    if not api_key:
-        raise RuntimeError("Missing YOUTUBE_API_KEY")
 
-    youtube = build("youtube", "v3", developerKey=api_key)
+def _video_id(v):
+    # search_youtube -> "video_id" ; items bruts de l'API -> "id"
+    return v.get("video_id") or v.get("id")
 
-    # ✅ FIX ICI
-    ids = ",".join(
-        v["id"]
-        for v in videos
-        if isinstance(v, dict) and "id" in v
-    )
 
-    if not ids:
+def analyze_market(videos):
+    videos = [v for v in videos if isinstance(v, dict) and _video_id(v)]
+    if not videos:
         return []
 
-    stats = youtube.videos().list(
-        part="statistics,contentDetails",
-        id=ids
-    ).execute()
+    # Dans un stats_scope(), réutilise les stats déjà récupérées par search_youtube
+    stats = get_videos([_video_id(v) for v in videos], part="statistics,contentDetails")
 
     results = []
 
-    for v, s in zip(videos, stats.get("items", [])):
+    for v in videos:
+        s = stats.get(_video_id(v))
+        if s is None:
+            continue
         views = int(s["statistics"].get("viewCount", 0))
         likes = int(s["statistics"].get("likeCount", 0))
 
@@ -33,7 +27,7 @@ def analyze_market(videos):
         score = views * like_rate
 
         results.append({
-            "title": v["snippet"]["title"],  # ✅ titre correct
+            "title": v.get("title") or v.get("snippet", {}).get("title"),
             "views": views,
             "likes": likes,
             "like_rate": like_rate,
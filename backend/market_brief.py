@@ -1,31 +1,63 @@
+import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any
 
-from .opportunity_mapper import get_fear_radar, get_opportunity_map
+from .opportunity_mapper import FEARS, ranked_fear_radar, map_to_opportunities
 
-def build_market_brief(niche: str = "business", objective: str = "leads", period: str = "weekly") -> Dict[str, Any]:
-    fear = get_fear_radar(niche=niche)
-    opp = get_opportunity_map(niche=niche)
+# Le brief ne dépend que du radar classé : RadarView renvoie la même liste tant
+# que rien n'a été ingéré, donc un brief en cache reste valide tant que son
+# radar est le radar courant (comparaison d'identité, aucun recalcul).
+BRIEF_CACHE_SIZE = int(os.getenv("MARKET_BRIEF_CACHE_SIZE", "64"))
+
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()   # (niche, objective, period) -> (ranked, brief)
+_cache_lock = threading.Lock()
+
+
+def get_market_brief(niche: str = "business", objective: str = "leads", period: str = "weekly") -> Dict[str, Any]:
+    """build_market_brief mémoïsé par (niche, objective, period) et version du radar."""
+    ranked = ranked_fear_radar()
+    key = (niche, objective, period)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] is ranked:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    brief = build_market_brief(niche, objective, period, ranked=ranked)
+    with _cache_lock:
+        _cache[key] = (ranked, brief)
+        _cache.move_to_end(key)
+        while len(_cache) > BRIEF_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return brief
+
+
+def build_market_brief(niche: str = "business", objective: str = "leads", period: str = "weekly", ranked=None) -> Dict[str, Any]:
+    # Un seul radar classé pour tout le brief (peurs, opportunités, hooks, titres A/B)
+    if ranked is None:
+        ranked = ranked_fear_radar()
+    top = ranked[:3]
+    mapped = [map_to_opportunities(fk, niche) for fk, _ in top]
 
     # Top fears (3 max)
     top_fears = []
-    for item in fear.get("fear_radar", [])[:3]:
+    for fk, data in top:
         top_fears.append({
-            "fear_key": item["fear_key"],
-            "fear_label_fr": item["fear_label_fr"],
+            "fear_key": fk,
+            "fear_label_fr": FEARS.get(fk, {}).get("label_fr", "Autre / non classé"),
             "signal": {
-                "sum_views_per_day": item["sum_views_per_day"],
-                "videos_count": item["videos_count"]
+                "sum_views_per_day": int(data["sum_vpd"]),
+                "videos_count": data["count"]
             },
-            "proof": item.get("examples", [])[:3]
+            "proof": data["examples"][:3]
         })
 
     # Top opportunities (3 max) -> on prend celles liées aux top fears
     top_opps = []
     rid = 1
-    for entry in (opp.get("fear_radar", [])[:3]):
-        fear_obj = entry.get("fear", {})
-        signal = entry.get("signal", {})
+    for fear_obj in mapped:
         # On prend 1-2 hooks comme opportunité "actionnable"
         hooks = fear_obj.get("video_hooks", [])[:2]
         if not hooks:
@@ -51,8 +83,7 @@ def build_market_brief(niche: str = "business", objective: str = "leads", period
 
     # Content pack (V1)
     hooks = []
-    for entry in (opp.get("fear_radar", [])[:3]):
-        fear_obj = entry.get("fear", {})
+    for fear_obj in mapped:
         hooks.extend(fear_obj.get("video_hooks", [])[:3])
     hooks = hooks[:10]
 
@@ -89,4 +120,4 @@ def build_market_brief(niche: str = "business", objective: str = "leads", period
                 "cta": cta
             }
         }
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import DATA_DIR, VIDEOS_FILE, SNAPSHOT_FILE
+from .core import load_videos, load_snapshots, get_winners, RANK_BY
+from .opportunity_v4 import summarize_market
+from .timing import span
+
+# Market intel (sortie de summarize_market V4) précalculée pour les presets
+# (threshold_vpd, top_k) standards, persistée avec un tampon de version des
+# données. /generate-plan prend l'intel du preset si le tampon correspond encore
+# aux JSONL sur disque : pas de chargement des données ni de calcul des winners.
+#
+# Rafraîchie à la fin de chaque scan (seed_scan) et par un thread de fond dans
+# l'API (au cas où un scan tourne ailleurs sans appeler refresh_presets).
+
+INTEL_FORMAT_VERSION = 1
+INTEL_DIR = os.path.join(DATA_DIR, "intel")
+INTEL_REFRESH_S = float(os.getenv("INTEL_REFRESH_S", "60"))
+
+
+def _parse_presets(spec: str) -> List[Tuple[int, int]]:
+    out = []
+    for item in spec.split(","):
+        if item.strip():
+            threshold, top_k = item.split(":")
+            out.append((int(threshold), int(top_k)))
+    return out
+
+
+# défaut de GeneratePlanRequest + variantes courantes ; ex: INTEL_PRESETS="20000:25,10000:50"
+INTEL_PRESETS = _parse_presets(os.getenv("INTEL_PRESETS", "20000:25,20000:50,10000:25"))
+
+
+def data_stamp() -> str:
+    """Identifie l'état des JSONL sur disque (inode, taille, mtime) sans les lire."""
+    parts = []
+    for path in (VIDEOS_FILE, SNAPSHOT_FILE):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}")
+        except FileNotFoundError:
+            parts.append("-")
+    # le mode de classement change les winners : il fait partie du tampon
+    return f"v{INTEL_FORMAT_VERSION}|{RANK_BY}|" + "|".join(parts)
+
+
+def _path(threshold_vpd: int, top_k: int) -> str:
+    return os.path.join(INTEL_DIR, f"intel_{threshold_vpd}_{top_k}.json")
+
+
+def compute_intel(threshold_vpd: int, top_k: int) -> Optional[Dict[str, Any]]:
+    """None si aucun winner (pas assez de snapshots)."""
+    with span("load"):
+        videos = load_videos()
+        snaps = load_snapshots()
+    with span("winners"):
+        winners = get_winners(videos, snaps, threshold_vpd, top_k)
+    if not winners:
+        return None
+    with span("summarize"):
+        return summarize_market(videos, winners)
+
+
+# {(threshold_vpd, top_k): entrée persistée} : évite de relire le fichier à chaque plan
+_memo: Dict[Tuple[int, int], Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _store(threshold_vpd: int, top_k: int, stamp: str, intel: Optional[Dict[str, Any]]) -> None:
+    # stamp pris AVANT le calcul : si les données bougent pendant, l'entrée sera vue périmée
+    entry = {
+        "stamp": stamp,
+        "threshold_vpd": threshold_vpd,
+        "top_k": top_k,
+        "computed_at": datetime.now().isoformat(),
+        "intel": intel,
+    }
+    os.makedirs(INTEL_DIR, exist_ok=True)
+    path = _path(threshold_vpd, top_k)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    with _lock:
+        _memo[(threshold_vpd, top_k)] = entry
+
+
+def refresh_presets(force: bool = False) -> int:
+    """Recalcule les presets dont le tampon est périmé. Retourne le nombre recalculé."""
+    n = 0
+    for threshold_vpd, top_k in INTEL_PRESETS:
+        stamp = data_stamp()
+        if not force and _cached(threshold_vpd, top_k, stamp) is not None:
+            continue
+        _store(threshold_vpd, top_k, stamp, compute_intel(threshold_vpd, top_k))
+        n += 1
+    return n
+
+
+def _cached(threshold_vpd: int, top_k: int, stamp: str) -> Optional[Dict[str, Any]]:
+    key = (threshold_vpd, top_k)
+    with _lock:
+        entry = _memo.get(key)
+    if entry is None or entry["stamp"] != stamp:
+        try:
+            with open(_path(threshold_vpd, top_k), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        with _lock:
+            _memo[key] = entry
+    return entry if entry["stamp"] == stamp else None
+
+
+def get_intel(threshold_vpd: int, top_k: int) -> Optional[Dict[str, Any]]:
+    """Intel du preset si à jour, sinon calcul direct (persisté si c'est un preset)."""
+    stamp = data_stamp()
+    entry = _cached(threshold_vpd, top_k, stamp)
+    if entry is not None:
+        return entry["intel"]
+
+    intel = compute_intel(threshold_vpd, top_k)
+    if (threshold_vpd, top_k) in INTEL_PRESETS:
+        _store(threshold_vpd, top_k, stamp, intel)
+    return intel
+
+
+class IntelRefresher:
+    """Thread de fond : recalcule les presets quand les JSONL ont changé."""
+
+    def __init__(self, interval_s: float = INTEL_REFRESH_S):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="intel-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                refresh_presets()
+            except Exception as e:
+                print(f"[market_intel] refresh failed: {type(e).__name__}: {e}")
+            self._stop.wait(self.interval_s)
+
+
+_REFRESHER = IntelRefresher()
+
+
+def start_refresher() -> None:
+    _REFRESHER.start()
+
+
+def main():
+    t0 = time.perf_counter()
+    n = refresh_presets(force=True)
+    print(f"Refreshed {n} intel presets in {time.perf_counter() - t0:.2f}s -> {INTEL_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,18 @@
 import json
-import re
 import html
+import threading
 from collections import defaultdict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Dict, Any
 
-VIDEOS_FILE = "data/videos.jsonl"
-SNAPSHOT_FILE = "data/snapshots.jsonl"
+from .snapshot_store import get_store
+from .core import FEARS, keep_title, fear_primary, load_videos, load_snapshots, get_winners
+from .radar_view import RadarView
+from .timing import span
 
-# ===== Filters (reprend ton stack) =====
-BUSINESS_ONLY = True
 THRESHOLD_VPD = 20000
 TOP_K_WINNERS = 50
 
-BLOCK_WORDS = {
-    "insulin","ozempic","keto","cancer","dementia","gut","fat","doctor","poo","health",
-    "diet","protein","workout","gym","calories","supplement","testosterone","hormone",
-    "sleep","adhd","anxiety","depression","autism","disease","symptom","blood","cholesterol",
-    "diabetes","weight","skin","hair","fasting","longevity","brain","neuroscience","dopamine",
-    "psychology","therapy",
-    "motivation","motivational","discipline","mindset","manifest","affirmation","affirmations",
-}
-
-BUSINESS_WHITELIST = {
-    "business","money","wealth","rich","profit","revenue","sales","marketing","startup",
-    "entrepreneur","entrepreneurship","agency","saas","copywriting","closing",
-    "real estate","investing","investor","stock","stocks","crypto","bitcoin","finance",
-    "valuation","deal","ecommerce","shopify","amazon","ads","advertising",
-    "ai","artificial intelligence","automation","agents","b2b","pricing","offer",
-    "funnel","funnels","lead","leads","clients","customer","customers"
-}
-
-STOPWORDS = {
-    "the","a","an","and","or","to","of","in","on","for","with","is","are","you","your","i","we","they","my",
-    "this","that","it","how","what","why","when","who","will","new","from","vs","as","at","by","be","do","does",
-    "these","those","should","only","before","after","into","out","than","about","over","under","up","down",
-}
-
-# ===== Fear taxonomy (same as fear_map) =====
-FEARS = {
-    "financial_decline": {
-        "label_fr": "Déclin financier (devenir pauvre / mauvaises décisions)",
-        "keywords": {"poor","poorer","broke","money","income","wealth","renting","house","invest","investing","crypto","smart investment","salary","profit","crash"}
-    },
-    "ai_obsolescence": {
-        "label_fr": "Obsolescence IA (perdre son job / devenir inutile)",
-        "keywords": {"ai","jobs","exist","automation","future","years","changes","won't exist","will not exist","robots"}
-    },
-    "business_failure": {
-        "label_fr": "Échec business (ton système est cassé)",
-        "keywords": {"business","startup","fail","failure","mistake","kills","dead","dying","bankrupt","lose","losing","revenue"}
-    },
-    "status_loss": {
-        "label_fr": "Perte de statut (être derrière / humilié)",
-        "keywords": {"top","best","secret","nobody","truth","wrong","stop","only","should"}
-    },
-    "relationship_break": {
-        "label_fr": "Rupture / divorce (perte relationnelle)",
-        "keywords": {"divorce","marriage","dating","relationship","breakup"}
-    },
-    "attention_decay": {
-        "label_fr": "Cerveau / attention détruite (dopamine, short-form)",
-        "keywords": {"dopamine","short","form","frying","addiction","brain","attention"}
-    },
-}
-
 # ===== Playbooks (monétisation) =====
 PLAYBOOKS = {
     "ai_obsolescence": {
@@ -188,84 +136,8 @@ PLAYBOOKS = {
     }
 }
 
-def normalize_title(title: str) -> str:
-    t = html.unescape(title or "").lower().strip()
-    t = t.replace("’", "'")
-    return t
-
-def tokenize(title: str):
-    t = normalize_title(title)
-    t = re.sub(r"[^a-z0-9\s']", " ", t)
-    toks = [x for x in t.split() if x and x not in STOPWORDS and len(x) > 2]
-    return toks
-
-def is_blocked(title: str) -> bool:
-    t = normalize_title(title)
-    return any(w in t for w in BLOCK_WORDS)
-
-def is_business(title: str) -> bool:
-    t = normalize_title(title)
-    return any(w in t for w in BUSINESS_WHITELIST)
-
-def load_videos():
-    vids = {}
-    with open(VIDEOS_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            v = json.loads(line)
-            vids[v["id"]] = v
-    return vids
-
-def load_snapshots():
-    snaps = defaultdict(list)
-    with open(SNAPSHOT_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            s = json.loads(line)
-            snaps[s["video_id"]].append(s)
-    return snaps
-
-def views_per_day(snaps):
-    snaps.sort(key=lambda x: x["timestamp"])
-    t1 = datetime.fromisoformat(snaps[0]["timestamp"])
-    t2 = datetime.fromisoformat(snaps[-1]["timestamp"])
-    days = max(1e-6, (t2 - t1).total_seconds() / 86400.0)
-    dv = (snaps[-1]["views"] - snaps[0]["views"])
-    return dv / days
-
-def fear_primary(title: str) -> str:
-    t = normalize_title(title)
-    toks = set(tokenize(title))
-    best = ("other", 0)
-
-    for fk, meta in FEARS.items():
-        sc = 0
-        for kw in meta["keywords"]:
-            if " " in kw:
-                if kw in t:
-                    sc += 2
-            else:
-                if kw in toks or kw in t:
-                    sc += 1
-        if sc > best[1]:
-            best = (fk, sc)
-
-    return best[0] if best[1] > 0 else "other"
-
 def build_fear_radar(videos, snaps):
-    winners = []
-    for vid, s in snaps.items():
-        if len(s) < 2 or vid not in videos:
-            continue
-        title = videos[vid].get("title", "")
-        if is_blocked(title):
-            continue
-        if BUSINESS_ONLY and not is_business(title):
-            continue
-        vpd = views_per_day(s)
-        if vpd >= THRESHOLD_VPD:
-            winners.append((vid, vpd))
-
-    winners.sort(key=lambda x: -x[1])
-    winners = winners[:TOP_K_WINNERS]
+    winners = get_winners(videos, snaps, THRESHOLD_VPD, TOP_K_WINNERS, rank_by="vpd")
 
     agg = defaultdict(lambda: {"count": 0, "sum_vpd": 0.0, "examples": []})
     for vid, vpd in winners:
@@ -291,6 +163,27 @@ def build_fear_radar(videos, snaps):
     ranked = sorted(agg.items(), key=lambda kv: -kv[1]["sum_vpd"])
     return ranked
 
+_RADAR_VIEW = None
+_RADAR_LOCK = threading.Lock()
+
+def get_radar_view() -> RadarView:
+    # Vue matérialisée branchée sur le store : mise à jour à chaque ingestion
+    global _RADAR_VIEW
+    if _RADAR_VIEW is None:
+        with _RADAR_LOCK:
+            if _RADAR_VIEW is None:
+                view = RadarView(THRESHOLD_VPD, TOP_K_WINNERS, keep=keep_title, fear_of=fear_primary)
+                get_store().subscribe(view)
+                _RADAR_VIEW = view
+    return _RADAR_VIEW
+
+def ranked_fear_radar():
+    """Même résultat que build_fear_radar(load_videos(), load_snapshots()), en O(nb de peurs)."""
+    with span("radar"):
+        view = get_radar_view()
+        get_store().refresh()
+        return view.ranked()
+
 def map_to_opportunities(fear_key: str, niche: str):
     pb = PLAYBOOKS.get(fear_key, PLAYBOOKS["other"])
     # petite personnalisation niche
@@ -310,10 +203,8 @@ def map_to_opportunities(fear_key: str, niche: str):
         "video_hooks": hooks,
         "cta": pb["cta"],
     }
-def get_fear_radar(niche: str = "saas") -> Dict[str, Any]:
-    videos = load_videos()
-    snaps = load_snapshots()
-    ranked = build_fear_radar(videos, snaps)
+def fear_radar_payload(ranked, niche: str = "saas") -> Dict[str, Any]:
+    """Réponse /fear-radar à partir d'un radar déjà classé (cf. ranked_fear_radar)."""
     if not ranked:
         return {"niche": niche, "error": "No winners found", "fear_radar": []}
 
@@ -337,10 +228,8 @@ def get_fear_radar(niche: str = "saas") -> Dict[str, Any]:
     return result
 
 
-def get_opportunity_map(niche: str = "saas") -> Dict[str, Any]:
-    videos = load_videos()
-    snaps = load_snapshots()
-    ranked = build_fear_radar(videos, snaps)
+def opportunity_map_payload(ranked, niche: str = "saas") -> Dict[str, Any]:
+    """Réponse /opportunity-map à partir d'un radar déjà classé."""
     if not ranked:
         return {"niche": niche, "error": "No winners found", "fear_radar": []}
 
@@ -363,7 +252,16 @@ def get_opportunity_map(niche: str = "saas") -> Dict[str, Any]:
         })
 
     return out
-    
+
+
+def get_fear_radar(niche: str = "saas") -> Dict[str, Any]:
+    return fear_radar_payload(ranked_fear_radar(), niche)
+
+
+def get_opportunity_map(niche: str = "saas") -> Dict[str, Any]:
+    return opportunity_map_payload(ranked_fear_radar(), niche)
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser()
@@ -379,23 +277,7 @@ def main():
         print("No winners found. Run seed_scan/snapshots again.")
         return
 
-    out = {
-        "niche": args.niche,
-        "threshold_vpd": THRESHOLD_VPD,
-        "generated_at": datetime.now().isoformat(),
-        "fear_radar": []
-    }
-
-    for fk, data in ranked:
-        mapped = map_to_opportunities(fk, args.niche)
-        out["fear_radar"].append({
-            "fear": mapped,
-            "signal": {
-                "videos_count": data["count"],
-                "sum_views_per_day": int(data["sum_vpd"]),
-                "examples": data["examples"]
-            }
-        })
+    out = opportunity_map_payload(ranked, args.niche)
 
     # save
     import os
@@ -1,123 +1,19 @@
 import os
 import json
 import argparse
-from collections import defaultdict, Counter
-from datetime import datetime
-import re
+from collections import Counter
 import html
 
 from .env import load_env
-
-VIDEOS_FILE = "data/videos.jsonl"
-SNAPSHOT_FILE = "data/snapshots.jsonl"
-
-BUSINESS_ONLY = True
-
-BLOCK_WORDS = {
-    "insulin","ozempic","keto","cancer","dementia","gut","fat","doctor","poo","health",
-    "diet","protein","workout","gym","calories","supplement","testosterone","hormone",
-    "sleep","adhd","anxiety","depression","autism","disease","symptom","blood","cholesterol",
-    "diabetes","weight","skin","hair","fasting","longevity","brain","neuroscience","dopamine",
-    "psychology","therapy",
-    "motivation","motivational","discipline","mindset","manifest","affirmation","affirmations",
-}
-
-BUSINESS_WHITELIST = {
-    "business","money","wealth","rich","profit","revenue","sales","marketing","startup",
-    "entrepreneur","entrepreneurship","agency","saas","copywriting","closing",
-    "real estate","investing","investor","stock","stocks","crypto","bitcoin","finance",
-    "valuation","deal","ecommerce","shopify","amazon","ads","advertising",
-    "ai","artificial intelligence","automation","agents","b2b","pricing","offer",
-    "funnel","funnels","lead","leads","clients","customer","customers"
-}
-
-STOPWORDS = {
-    "the","a","an","and","or","to","of","in","on","for","with","is","are","you","your","i","we","they","my",
-    "this","that","it","how","what","why","when","who","will","new","from","vs","as","at","by","be","do","does",
-    "these","those","should","only","before","after","into","out","than","about","over","under","up","down",
-}
-
-LEX = {
-    "money": {"money","wealth","rich","poor","income","cash","salary","profit","million","billion"},
-    "business": {"business","entrepreneur","entrepreneurship","startup","company","ceo","founder","operator"},
-    "sales": {"sales","sell","selling","closing","closer","deal","pipeline"},
-    "marketing": {"marketing","ads","advertising","copywriting","funnel","funnels","leads","clients","acquisition"},
-    "investing": {"investing","investor","stocks","stock","crypto","bitcoin","real","estate","valuation"},
-    "ai": {"ai","artificial","intelligence","automation","agents","jobs","future"},
-    "authority": {"expert","ceo","founder","investor","billionaire","professor","author"},
-    "contrarian": {"truth","myth","lie","wrong","stop","dont","don’t","shouldnt","shouldn’t","poorer"},
-    "urgency": {"now","before","warning","crash","collapse","months","years"},
-}
+from .core import tokenize, multi_labels, load_videos, load_snapshots, get_winners, RANK_BY, RANK_MODES
+from . import llm_cache
+from .llm_cache import PRIMARY_MODEL, FALLBACK_MODEL, openai_completion, parse_plan_text
+from .json_stream import JsonArrayStreamer
 
 OBJECTIVES = ["visibility", "leads", "sales", "authority", "launch"]
 
-def normalize_title(title: str) -> str:
-    return html.unescape(title or "").lower().strip()
-
-def is_blocked(title: str) -> bool:
-    t = normalize_title(title)
-    return any(w in t for w in BLOCK_WORDS)
-
-def is_business(title: str) -> bool:
-    t = normalize_title(title)
-    return any(w in t for w in BUSINESS_WHITELIST)
-
-def tokenize(title: str):
-    t = normalize_title(title)
-    t = re.sub(r"[^a-z0-9\s']", " ", t)
-    return [x for x in t.split() if x and x not in STOPWORDS and len(x) > 2]
-
-def multi_labels(title: str):
-    toks = set(tokenize(title))
-    labels = set()
-    for label, words in LEX.items():
-        if toks.intersection(words):
-            labels.add(label)
-    if not labels:
-        labels.add("other")
-    return sorted(labels)
-
-def load_videos():
-    vids = {}
-    with open(VIDEOS_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            v = json.loads(line)
-            vids[v["id"]] = v
-    return vids
-
-def load_snapshots():
-    snaps = defaultdict(list)
-    with open(SNAPSHOT_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            s = json.loads(line)
-            snaps[s["video_id"]].append(s)
-    return snaps
-
-def views_per_day(snaps):
-    snaps.sort(key=lambda x: x["timestamp"])
-    t1 = datetime.fromisoformat(snaps[0]["timestamp"])
-    t2 = datetime.fromisoformat(snaps[-1]["timestamp"])
-    days = max(1e-6, (t2 - t1).total_seconds() / 86400.0)
-    dv = (snaps[-1]["views"] - snaps[0]["views"])
-    return dv / days
-
-def get_winners(videos, snaps, threshold_vpd: int, top_k: int):
-    winners = []
-    for vid, s in snaps.items():
-        if len(s) < 2 or vid not in videos:
-            continue
-        title = videos[vid].get("title", "")
-        if is_blocked(title):
-            continue
-        if BUSINESS_ONLY and not is_business(title):
-            continue
-
-        vpd = views_per_day(s)
-        if vpd >= threshold_vpd:
-            winners.append((vid, vpd))
-
-    winners.sort(key=lambda x: -x[1])
-    return winners[:top_k]
+# tableaux du plan émis élément par élément en streaming -> nom d'événement
+STREAM_ARRAYS = {"opportunities": "opportunity", "calendar": "calendar"}
 
 def summarize_market(videos, winners):
     label_counts = Counter()
@@ -150,36 +46,51 @@ def summarize_market(videos, winners):
         "top_titles": top_titles
     }
 
-def _openai_response_text(api_key: str, system: str, user_json: dict) -> str:
+def _primary_stream(api_key: str, system: str, user_json: dict):
+    """Deltas de texte du modèle principal, ou None si le SDK ne le permet pas."""
     try:
         from openai import OpenAI
         client = OpenAI(api_key=api_key)
-        resp = client.responses.create(
-            model="gpt-4.1-mini",
+        stream = client.responses.create(
+            model=PRIMARY_MODEL,
             input=[
                 {"role": "system", "content": system},
                 {"role": "user", "content": json.dumps(user_json, ensure_ascii=False)}
             ],
+            stream=True,
         )
-        return resp.output_text
     except Exception:
-        import openai
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": json.dumps(user_json, ensure_ascii=False)}
-            ],
-            temperature=0.6,
-        )
-        return resp["choices"][0]["message"]["content"]
+        return None
+    return (event.delta for event in stream if getattr(event, "type", "") == "response.output_text.delta")
+
+
+def _fallback_stream(api_key: str, system: str, user_json: dict):
+    import openai
+    openai.api_key = api_key
+    resp = openai.ChatCompletion.create(
+        model=FALLBACK_MODEL,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": json.dumps(user_json, ensure_ascii=False)}
+        ],
+        temperature=0.6,
+        stream=True,
+    )
+    for chunk in resp:
+        delta = chunk["choices"][0].get("delta", {}).get("content")
+        if delta:
+            yield delta
 
-def call_openai_v4(intel: dict, niche_fr: str, objective: str, ideas: int, days: int):
+
+def _require_api_key() -> str:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("Missing OPENAI_API_KEY in .env")
+    return api_key
+
 
+def build_prompt_v4(intel: dict, niche_fr: str, objective: str, ideas: int, days: int):
+    """Retourne (system, user_json) pour le kit de production V4."""
     system = (
         "Tu es un stratège YouTube business (data-driven) + copywriter. "
         "Tu dois t'appuyer uniquement sur market_intel fourni (dominant_levers, top_words, top_titles). "
@@ -288,15 +199,49 @@ def call_openai_v4(intel: dict, niche_fr: str, objective: str, ideas: int, days:
         )
     }
 
-    text = _openai_response_text(api_key, system, user_json)
-
-    try:
-        return json.loads(text)
-    except Exception:
-        m = re.search(r"\{.*\}", text, re.DOTALL)
-        if not m:
-            raise RuntimeError("Model did not return JSON.")
-        return json.loads(m.group(0))
+    return system, user_json
+
+
+def call_openai_v4(intel: dict, niche_fr: str, objective: str, ideas: int, days: int, force: bool = False):
+    api_key = _require_api_key()
+    system, user_json = build_prompt_v4(intel, niche_fr, objective, ideas, days)
+    return openai_completion(api_key, system, user_json, parse_plan_text, force=force)
+
+
+def stream_openai_v4(intel: dict, niche_fr: str, objective: str, ideas: int, days: int, force: bool = False):
+    """
+    Variante streaming de call_openai_v4. Yield des événements (type, data) :
+      ("token", str)                          delta brut du modèle
+      ("opportunity" | "calendar", {index, item})  dès qu'un élément est complet
+      ("plan", dict)                          plan final parsé (dernier événement)
+    Partage le cache LLM : un hit est rejoué d'un bloc.
+    """
+    api_key = _require_api_key()
+    system, user_json = build_prompt_v4(intel, niche_fr, objective, ideas, days)
+    streamer = JsonArrayStreamer(STREAM_ARRAYS)
+
+    # même ordre que openai_completion : cache puis appel du principal, puis du fallback
+    model = PRIMARY_MODEL
+    cached = None if force else llm_cache.lookup(model, system, user_json)
+    chunks = _primary_stream(api_key, system, user_json) if cached is None else None
+    if cached is None and chunks is None:
+        model = FALLBACK_MODEL
+        cached = None if force else llm_cache.lookup(model, system, user_json)
+        if cached is None:
+            chunks = _fallback_stream(api_key, system, user_json)
+    if cached is not None:
+        chunks = [cached]
+
+    for delta in chunks:
+        yield "token", delta
+        for key, idx, item in streamer.feed(delta):
+            yield STREAM_ARRAYS[key], {"index": idx, "item": item}
+
+    text = streamer.text
+    plan = parse_plan_text(text)
+    if cached is None:
+        llm_cache.store(model, system, user_json, text)
+    yield "plan", plan
 
 def main():
     parser = argparse.ArgumentParser()
@@ -304,8 +249,10 @@ def main():
     parser.add_argument("--objective", default="leads", choices=OBJECTIVES)
     parser.add_argument("--threshold_vpd", type=int, default=20000)
     parser.add_argument("--top_k", type=int, default=25)
+    parser.add_argument("--rank_by", default=RANK_BY, choices=RANK_MODES)
     parser.add_argument("--ideas", type=int, default=8)   # V4 = lourd, 8 est un bon start
     parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--force", action="store_true", help="ignore le cache LLM")
     args = parser.parse_args()
 
     load_env(".env")
@@ -313,7 +260,7 @@ def main():
     videos = load_videos()
     snaps = load_snapshots()
 
-    winners = get_winners(videos, snaps, args.threshold_vpd, args.top_k)
+    winners = get_winners(videos, snaps, args.threshold_vpd, args.top_k, rank_by=args.rank_by)
     if not winners:
         print("No winners found. Run snapshots again (seed_scan) to get >=2 snapshots per video.")
         return
@@ -332,7 +279,8 @@ def main():
         niche_fr=args.niche,
         objective=args.objective,
         ideas=args.ideas,
-        days=args.days
+        days=args.days,
+        force=args.force,
     )
 
     print("\n=== OPPORTUNITY PLAN V4 (FR + PRODUCTION KIT) ===\n")
@@ -0,0 +1,123 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Tuple
+
+from .db import insert_plan
+from .plan_store import PLAN_STORAGE, encode_plan
+from .opportunity_v5 import slug, render_markdown, compact_for_ui, write_json
+from .opportunity_v4 import call_openai_v4, stream_openai_v4
+from .market_intel import get_intel
+from .timing import span
+
+# Pipeline de génération d'un plan (data -> OpenAI V4 -> exports V5 -> DB).
+# Appelé par /generate-plan et par les jobs (backend/jobs.py) ; stream_plan
+# est la variante SSE (/generate-plan/stream).
+
+
+class NoWinnersError(RuntimeError):
+    pass
+
+
+def prepare_intel(params: Dict[str, Any]) -> Dict[str, Any]:
+    # presets standards : intel précalculée (market_intel.py), pas de chargement des données
+    with span("intel"):
+        intel = get_intel(params["threshold_vpd"], params["top_k"])
+    if intel is None:
+        raise NoWinnersError("No winners found (need >=2 snapshots per video). Run seed_scan again.")
+    return intel
+
+
+def save_plan(params: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
+    niche = params["niche"]
+    objective = params["objective"]
+
+    with span("render"):
+        md = render_markdown(plan)
+    row = {
+        "created_at": datetime.now().isoformat(),
+        "niche": niche,
+        "objective": objective,
+        "threshold_vpd": params["threshold_vpd"],
+        "top_k": params["top_k"],
+        "ideas": params["ideas"],
+        "days": params["days"],
+    }
+
+    if PLAN_STORAGE == "inline":
+        # une seule écriture : le JSON compressé dans la ligne, md/ui dérivés à la lecture
+        with span("encode"):
+            row["plan_codec"], row["plan_blob"] = encode_plan(plan)
+        files = None
+    else:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = f"plan_{slug(niche)}_{slug(objective)}_{stamp}"
+        json_path = os.path.join("output", base + ".json")
+        md_path = os.path.join("output", base + ".md")
+        ui_path = os.path.join("output", base + "_ui.json")
+
+        with span("write"):
+            write_json(json_path, plan)
+
+            with open(md_path, "w", encoding="utf-8") as f:
+                f.write(md)
+
+            ui = compact_for_ui(plan)
+            write_json(ui_path, ui)
+
+        row["plan_json_path"] = json_path
+        row["plan_md_path"] = md_path
+        row["plan_ui_json_path"] = ui_path
+        files = {"json": json_path, "md": md_path, "ui": ui_path}
+
+    with span("db"):
+        plan_id = insert_plan(row)
+
+    return {
+        "id": plan_id,
+        "markdown": md,
+        "meta": {
+            "niche": niche,
+            "objective": objective,
+            "ideas": params["ideas"],
+            "days": params["days"],
+        },
+        "files": files,
+    }
+
+
+def generate_plan(params: Dict[str, Any]) -> Dict[str, Any]:
+    # 1) Charger data
+    intel = prepare_intel(params)
+
+    # 2) Générer via OpenAI (V4)
+    with span("openai"):
+        plan = call_openai_v4(
+            intel=intel,
+            niche_fr=params["niche"],
+            objective=params["objective"],
+            ideas=params["ideas"],
+            days=params["days"],
+            force=params.get("force", False),
+        )
+
+    # 3) Export files (V5) + 4) Insert DB
+    return save_plan(params, plan)
+
+
+def stream_plan(params: Dict[str, Any], intel: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (event, data) : token / opportunity / calendar au fil de la génération,
+    puis "done" avec le même résultat que generate_plan (plan sauvegardé).
+    """
+    for event, data in stream_openai_v4(
+        intel=intel,
+        niche_fr=params["niche"],
+        objective=params["objective"],
+        ideas=params["ideas"],
+        days=params["days"],
+        force=params.get("force", False),
+    ):
+        if event == "plan":
+            yield "done", save_plan(params, data)
+        else:
+            yield event, data
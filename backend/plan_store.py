@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from .db import get_plan_with_blob, plan_exists as _db_plan_exists
+from .opportunity_v5 import render_markdown, compact_for_ui
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Stockage du plan canonique :
+#   PLAN_STORAGE=files  (défaut) : .json / .md / _ui.json dans output/, chemins en DB
+#   PLAN_STORAGE=inline          : JSON compressé (zstd si dispo, sinon gzip) dans
+#                                  plans.plan_blob ; md / ui dérivés à la lecture.
+# Un plan ne change jamais après création : les réponses sérialisées sont mémoïsées
+# par (id, format) dans un seul cache borné en octets (PLAN_BYTES_CACHE_MB).
+
+PLAN_STORAGE = os.getenv("PLAN_STORAGE", "files")
+PLAN_BYTES_CACHE_MB = float(os.getenv("PLAN_BYTES_CACHE_MB", "32"))
+
+FORMATS = ("ui", "json", "md")
+
+
+def encode_plan(plan: Dict[str, Any]) -> Tuple[str, bytes]:
+    raw = json.dumps(plan, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "gzip", gzip.compress(raw, compresslevel=6)
+
+
+def decode_plan(codec: str, blob: bytes) -> Dict[str, Any]:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Plan stored with zstd but the zstandard package is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == "gzip":
+        raw = gzip.decompress(blob)
+    else:
+        raise ValueError(f"Unknown plan codec: {codec}")
+    return json.loads(raw)
+
+
+class PlanNotFound(LookupError):
+    pass
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _content(plan_id: int, format: str):
+    row = get_plan_with_blob(plan_id)
+    if not row:
+        raise PlanNotFound(plan_id)
+
+    if row["plan_blob"] is None:
+        # plan "files" : formes déjà exportées sur disque
+        if format == "md":
+            with open(row["plan_md_path"], "r", encoding="utf-8") as f:
+                return {"markdown": f.read()}
+        return _read_json(row["plan_ui_json_path"] if format == "ui" else row["plan_json_path"])
+
+    plan = decode_plan(row["plan_codec"], row["plan_blob"])
+    if format == "ui":
+        return compact_for_ui(plan)
+    if format == "md":
+        return {"markdown": render_markdown(plan)}
+    return plan
+
+
+def plan_content(plan_id: int, format: str = "ui"):
+    """Contenu d'un plan (ui | json | md). PlanNotFound / ValueError sinon."""
+    if format not in FORMATS:
+        raise ValueError(f"Invalid format: {format}")
+    return _content(plan_id, format)
+
+
+class _BytesLRU:
+    """LRU borné en octets des réponses sérialisées (clé = (plan_id, format))."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[Tuple[int, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+_BYTES = _BytesLRU(int(PLAN_BYTES_CACHE_MB * 1024 * 1024))
+
+
+def plan_exists(plan_id: int, format: str = "ui") -> bool:
+    """Réponse déjà en cache, sinon lookup par clé primaire (avant un 304)."""
+    return _BYTES.get((plan_id, format)) is not None or _db_plan_exists(plan_id)
+
+
+def plan_etag(plan_id: int, format: str) -> str:
+    # les plans sont immuables : id + format identifient le contenu
+    return f'"plan-{plan_id}-{format}"'
+
+
+def plan_content_bytes(plan_id: int, format: str = "ui") -> bytes:
+    """Réponse JSON déjà sérialisée ; un rechargement front ne touche ni disque ni DB."""
+    key = (plan_id, format)
+    data = _BYTES.get(key)
+    if data is None:
+        data = json.dumps(plan_content(plan_id, format), ensure_ascii=False).encode("utf-8")
+        _BYTES.put(key, data)
+    return data
@@ -0,0 +1,105 @@
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+# Quota YouTube Data API : chaque méthode coûte des "unités" (search.list = 100,
+# la plupart des list = 1). Token bucket partagé entre threads pour lisser le
+# débit + budget total optionnel, et retry avec backoff jitteré sur 403/429/5xx.
+
+METHOD_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+    "channels.list": 1,
+    "playlistItems.list": 1,
+}
+
+QUOTA_UNITS_PER_SEC = float(os.getenv("YOUTUBE_QUOTA_UNITS_PER_SEC", "20"))
+QUOTA_BURST = float(os.getenv("YOUTUBE_QUOTA_BURST", "100"))
+QUOTA_BUDGET = int(os.getenv("YOUTUBE_QUOTA_BUDGET", "10000"))   # quota quotidien par défaut d'un projet
+
+RETRY_STATUSES = {403, 429, 500, 502, 503, 504}
+FATAL_REASONS = ("quotaExceeded", "dailyLimitExceeded")
+
+T = TypeVar("T")
+
+
+class QuotaExceeded(RuntimeError):
+    pass
+
+
+class QuotaWaitCancelled(RuntimeError):
+    """L'événement stop du limiter a été levé pendant l'attente de jetons."""
+
+
+class QuotaLimiter:
+    def __init__(self, units_per_sec: float = QUOTA_UNITS_PER_SEC, burst: float = QUOTA_BURST,
+                 budget: Optional[int] = QUOTA_BUDGET, costs: Dict[str, int] = METHOD_COSTS,
+                 stop: Optional[threading.Event] = None):
+        self.rate = units_per_sec
+        # stop : l'attente de jetons se fait sur cet événement (arrêt immédiat d'un daemon)
+        self.stop = stop
+        self.burst = burst
+        self.budget = budget
+        self.costs = costs
+        self.used: Dict[str, int] = {}
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def cost(self, method: str) -> int:
+        return self.costs.get(method, 1)
+
+    @property
+    def total_used(self) -> int:
+        return sum(self.used.values())
+
+    def acquire(self, method: str, calls: int = 1) -> None:
+        """Bloque jusqu'à disposer des unités ; QuotaExceeded si le budget serait dépassé."""
+        units = self.cost(method) * calls
+        while True:
+            with self._lock:
+                if self.budget is not None and self.total_used + units > self.budget:
+                    raise QuotaExceeded(f"Quota budget exhausted ({self.total_used}/{self.budget} units)")
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                # une requête plus chère que le burst passe quand le seau est plein
+                need = min(units, self.burst)
+                if self._tokens >= need:
+                    self._tokens -= units
+                    self.used[method] = self.used.get(method, 0) + units
+                    return
+                wait = (need - self._tokens) / self.rate
+            if self.stop is None:
+                time.sleep(wait)
+            elif self.stop.wait(wait):
+                raise QuotaWaitCancelled("Stopped while waiting for quota")
+
+
+def _http_status(e: Exception) -> Optional[int]:
+    resp = getattr(e, "resp", None)
+    status = getattr(resp, "status", None)
+    return int(status) if status is not None else None
+
+
+def call_with_retry(fn: Callable[[], T], retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0) -> T:
+    """fn() avec backoff exponentiel "full jitter" sur 403/429/5xx (hors quota épuisé)."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            status = _http_status(e)
+            if status not in RETRY_STATUSES:
+                raise
+            content = getattr(e, "content", b"") or b""
+            if isinstance(content, bytes):
+                content = content.decode("utf-8", "replace")
+            if any(r in content for r in FATAL_REASONS):
+                raise QuotaExceeded(f"YouTube quota exhausted: {e}") from e
+            if attempt >= retries:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+            attempt += 1
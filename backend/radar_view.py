@@ -0,0 +1,153 @@
+import bisect
+import html
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .columnar import epoch_us, US_PER_DAY
+
+# Vue matérialisée du fear radar : mise à jour à chaque snapshot ingéré au lieu
+# de recalculer winners + agrégats à chaque requête.
+#
+# État par vidéo : premier/dernier point, nb de snapshots, vpd courant.
+# Classement global des vidéos qualifiées (liste triée), top-K = winners.
+# Par peur : membres du top-K triés par vpd (les 5 premiers = examples).
+# Une lecture coûte O(nb de peurs) tant que rien n'a bougé.
+
+
+class _Point:
+    __slots__ = ("seq", "first_ts", "first_views", "last_ts", "last_views", "count")
+
+    def __init__(self, seq: int, ts: int, views: int):
+        self.seq = seq
+        self.first_ts = self.last_ts = ts
+        self.first_views = self.last_views = views
+        self.count = 1
+
+
+class RadarView:
+    def __init__(self, threshold_vpd: float, top_k: int, keep, fear_of):
+        self.threshold_vpd = threshold_vpd
+        self.top_k = top_k
+        self.keep = keep          # keep(title) -> bool (filtres blocklist/business)
+        self.fear_of = fear_of    # fear_of(title) -> fear_key
+        self._lock = threading.Lock()
+        self.on_reset()
+
+    # ----- ingestion (listener du SnapshotStore) -----
+    def on_reset(self) -> None:
+        self._videos: Dict[str, dict] = {}
+        self._points: Dict[str, _Point] = {}
+        self._keys: Dict[str, Tuple[float, int, str]] = {}   # vid -> clé dans _ranked
+        self._ranked: List[Tuple[float, int, str]] = []      # (-vpd, seq, vid)
+        self._top: Dict[str, Tuple[Tuple[float, int, str], str]] = {}  # vid -> (clé, fear)
+        self._buckets: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._cached: Optional[list] = None
+
+    def on_videos(self, records) -> None:
+        with self._lock:
+            for v in records:
+                vid = v["id"]
+                self._videos[vid] = v
+                entry = self._top.pop(vid, None)
+                if entry is not None:
+                    # titre/chaîne peuvent changer : on ré-évalue la peur et les examples
+                    self._bucket_remove(entry[1], entry[0])
+                    self._cached = None
+                self._rerank(vid)
+            self._sync_top()
+
+    def on_snapshots(self, records) -> None:
+        with self._lock:
+            for s in records:
+                vid = s["video_id"]
+                ts = epoch_us(s["timestamp"])
+                views = int(s["views"])
+                p = self._points.get(vid)
+                if p is None:
+                    self._points[vid] = _Point(len(self._points), ts, views)
+                else:
+                    p.count += 1
+                    # >= / < : même résultat qu'un tri stable par timestamp
+                    if ts >= p.last_ts:
+                        p.last_ts, p.last_views = ts, views
+                    if ts < p.first_ts:
+                        p.first_ts, p.first_views = ts, views
+                self._rerank(vid)
+            self._sync_top()
+
+    def _vpd(self, vid: str) -> Optional[float]:
+        p = self._points.get(vid)
+        v = self._videos.get(vid)
+        if p is None or v is None or p.count < 2:
+            return None
+        if not self.keep(v.get("title", "")):
+            return None
+        days = max(1e-6, (p.last_ts - p.first_ts) / US_PER_DAY)
+        return (p.last_views - p.first_views) / days
+
+    def _rerank(self, vid: str) -> None:
+        old = self._keys.pop(vid, None)
+        if old is not None:
+            i = bisect.bisect_left(self._ranked, old)
+            del self._ranked[i]
+        vpd = self._vpd(vid)
+        if vpd is not None and vpd >= self.threshold_vpd:
+            key = (-vpd, self._points[vid].seq, vid)
+            bisect.insort(self._ranked, key)
+            self._keys[vid] = key
+
+    def _sync_top(self) -> None:
+        """Répercute les entrées/sorties du top-K sur les agrégats par peur."""
+        new_top = {key[2]: key for key in self._ranked[:self.top_k]}
+        changed = False
+
+        for vid, (key, fk) in list(self._top.items()):
+            if new_top.get(vid) != key:
+                self._bucket_remove(fk, key)
+                del self._top[vid]
+                changed = True
+
+        for vid, key in new_top.items():
+            if vid not in self._top:
+                fk = self.fear_of(self._videos[vid].get("title", ""))
+                self._bucket_add(fk, key)
+                self._top[vid] = (key, fk)
+                changed = True
+
+        if changed:
+            self._cached = None
+
+    def _bucket_add(self, fk: str, key) -> None:
+        bisect.insort(self._buckets.setdefault(fk, []), key)
+
+    def _bucket_remove(self, fk: str, key) -> None:
+        members = self._buckets[fk]
+        del members[bisect.bisect_left(members, key)]
+        if not members:
+            del self._buckets[fk]
+
+    # ----- lecture -----
+    def ranked(self) -> list:
+        """Même forme que build_fear_radar : [(fear_key, {count, sum_vpd, examples})]."""
+        with self._lock:
+            if self._cached is None:
+                out = []
+                # ordre d'apparition dans les winners (départage des égalités de sum_vpd)
+                for fk, members in sorted(self._buckets.items(), key=lambda kv: kv[1][0]):
+                    examples = []
+                    for neg_vpd, _, vid in members[:5]:
+                        v = self._videos[vid]
+                        examples.append({
+                            "video_id": vid,
+                            "views_per_day": int(-neg_vpd),
+                            "channel": v.get("channel", "?"),
+                            "title": html.unescape(v.get("title", "")),
+                        })
+                    # somme dans l'ordre des winners (pas de dérive flottante)
+                    sum_vpd = 0.0
+                    for k in members:
+                        sum_vpd += -k[0]
+                    out.append((fk, {"count": len(members), "sum_vpd": sum_vpd, "examples": examples}))
+                out.sort(key=lambda kv: -kv[1]["sum_vpd"])
+                self._cached = out
+            return self._cached
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .youtube import search_youtube, stats_scope
+from .market import analyze_market
+from .timing import span
+
+# Cache en mémoire de search_youtube + analyze_market (100 unités de quota et
+# quelques centaines de ms par recherche), clé = (requête normalisée, max_results) :
+# - frais (< SEARCH_CACHE_TTL_S) : servi tel quel ;
+# - périmé mais < TTL + SEARCH_CACHE_STALE_S : servi tout de suite, rafraîchi en
+#   arrière-plan (stale-while-revalidate) ;
+# - single-flight : des requêtes identiques concurrentes attendent le même appel ;
+# - LRU borné à SEARCH_CACHE_SIZE entrées.
+# Les valeurs sont partagées entre requêtes : lecture seule pour les appelants.
+
+SEARCH_CACHE_TTL_S = float(os.getenv("SEARCH_CACHE_TTL_S", "600"))
+SEARCH_CACHE_STALE_S = float(os.getenv("SEARCH_CACHE_STALE_S", "3600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SWRCache:
+    def __init__(self, loader: Callable[..., Any], ttl_s: float = SEARCH_CACHE_TTL_S,
+                 stale_s: float = SEARCH_CACHE_STALE_S, max_entries: int = SEARCH_CACHE_SIZE):
+        self.loader = loader
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()   # key -> (chargé à, valeur)
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "coalesced": 0, "refresh_errors": 0}
+
+    def get(self, key: Tuple) -> Any:
+        """loader(*key), mémoïsé."""
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                age = time.monotonic() - hit[0]
+                if age < self.ttl_s + self.stale_s:
+                    self._items.move_to_end(key)
+                    if age < self.ttl_s:
+                        self._stats["hits"] += 1
+                    else:
+                        self._stats["stale"] += 1
+                        if key not in self._inflight:
+                            flight = self._inflight[key] = _Flight()
+                            threading.Thread(target=self._revalidate, args=(key, flight),
+                                             name="search-cache-refresh", daemon=True).start()
+                    return hit[1]
+                del self._items[key]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if leader:
+            return self._load(key, flight)
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(self, key: Tuple, flight: _Flight) -> Any:
+        try:
+            value = self.loader(*key)
+        except BaseException as e:
+            # erreurs non mises en cache : la requête suivante retente
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            with self._lock:
+                self._items[key] = (time.monotonic(), value)
+                self._items.move_to_end(key)
+                while len(self._items) > self.max_entries:
+                    self._items.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _revalidate(self, key: Tuple, flight: _Flight) -> None:
+        try:
+            self._load(key, flight)
+        except Exception as e:
+            # l'entrée périmée reste servie jusqu'à la fin de sa fenêtre
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+            print(f"[search_cache] refresh failed for {key!r}: {type(e).__name__}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._items))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def _search_and_analyze(query: str, max_results: int):
+    # stats_scope ici : le rafraîchissement tourne aussi hors requête (thread de fond)
+    with stats_scope():
+        with span("youtube"):
+            videos = search_youtube(query, max_results=max_results)
+        with span("analyze"):
+            results = analyze_market(videos)
+    return videos, results
+
+
+_CACHE = SWRCache(_search_and_analyze)
+
+
+def search_and_analyze(query: str, max_results: int = 10):
+    """(videos, results) de search_youtube + analyze_market, via le cache."""
+    return _CACHE.get((normalize_query(query), int(max_results)))
+
+
+def cache_stats() -> Dict[str, int]:
+    return _CACHE.stats()
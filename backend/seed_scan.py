@@ -1,35 +1,150 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
 from backend.seeds import SEED_CHANNELS
 from backend.youtube import list_channel_videos
-from backend.storage import save_video, save_snapshot
-from datetime import datetime, timezone
+from backend.storage import save_video, save_snapshot, flush as flush_storage, DATA_DIR
+from backend.quota import QuotaLimiter, QuotaExceeded
+from backend.market_intel import refresh_presets
+
+# Scan concurrent des chaînes seed :
+# - pool de threads borné (les appels API bloquent, pas le CPU) ;
+# - QuotaLimiter partagé (unités par méthode, budget du scan) ;
+# - retry jitteré sur 403/5xx dans backend/youtube.py ;
+# - checkpoint : chaînes terminées, un scan interrompu reprend où il s'est arrêté ;
+#   un checkpoint plus vieux qu'une fenêtre de scan (SEED_SCAN_WINDOW_H) est
+#   ignoré : ses chaînes "faites" ont besoin d'un nouveau snapshot.
+# Les écritures JSONL restent dans le thread principal (un seul writer).
+#
+# Test local : YOUTUBE_API_ENDPOINT=http://127.0.0.1:8765/ -> faux serveur d'API.
+
+SCAN_CONCURRENCY = int(os.getenv("SEED_SCAN_CONCURRENCY", "8"))
+SCAN_WINDOW_H = float(os.getenv("SEED_SCAN_WINDOW_H", "24"))
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "seed_scan_checkpoint.json")
+
+
+def _checkpoint_age_s(state: dict) -> float:
+    try:
+        started = datetime.fromisoformat(state["started_at"])
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - started).total_seconds()
+
+
+def load_checkpoint(path: str = CHECKPOINT_FILE, window_h: float = SCAN_WINDOW_H) -> dict:
+    """Checkpoint du scan en cours, ou un nouveau si absent / plus vieux que window_h."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+    if state is not None and _checkpoint_age_s(state) > window_h * 3600:
+        print(f"Checkpoint from {state.get('started_at')} older than {window_h:g}h -> new scan")
+        state = None
+    if state is None:
+        state = {"started_at": datetime.now(timezone.utc).isoformat(), "done": []}
+    return state
+
+
+def save_checkpoint(state: dict, path: str = CHECKPOINT_FILE) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def store_channel_videos(name: str, items) -> None:
+    for v in items:
+        vid = v["id"]
+        title = v["snippet"]["title"]
+        stats = v.get("statistics", {})
+        views = int(stats.get("viewCount", 0))
+        likes = int(stats.get("likeCount", 0))
+
+        save_video({
+            "id": vid,
+            "title": title,
+            "channel": name,
+            "publishedAt": v["snippet"].get("publishedAt"),
+            "views": views,
+            "likes": likes,
+        })
+        save_snapshot(vid, views=views, likes=likes, comments=int(stats.get("commentCount", 0)))
+
+        print(f"{views} views | {likes} likes | {title}")
+
+
+def scan(channels: dict, max_results: int = 25, workers: int = SCAN_CONCURRENCY,
+         limiter: QuotaLimiter = None, checkpoint_path: str = CHECKPOINT_FILE, fresh: bool = False) -> dict:
+    """Retourne {"scanned", "skipped", "failed", "quota_used"}."""
+    if fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    state = load_checkpoint(checkpoint_path)
+    done = set(state["done"])
+    todo = [(name, cid) for name, cid in channels.items() if cid not in done]
+    limiter = limiter or QuotaLimiter()
+
+    scanned, failed = 0, []
+    stopped = False
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seed-scan") as pool:
+        futures = {
+            pool.submit(list_channel_videos, cid, max_results, limiter): (name, cid)
+            for name, cid in todo
+        }
+        for fut in as_completed(futures):
+            name, cid = futures[fut]
+            try:
+                items = fut.result()
+            except QuotaExceeded as e:
+                if not stopped:
+                    print(f"\n!!! {e} -> arrêt, relancer pour reprendre")
+                    stopped = True
+                    for f in futures:
+                        f.cancel()
+                continue
+            except Exception as e:
+                print(f"\n--- {name} --- FAILED: {type(e).__name__}: {e}")
+                failed.append(name)
+                continue
+
+            print(f"\n--- {name} ---")
+            store_channel_videos(name, items)
+            # données sur disque avant de marquer la chaîne comme faite
+            flush_storage()
+            state["done"].append(cid)
+            save_checkpoint(state, checkpoint_path)
+            scanned += 1
+
+    if not stopped and not failed and os.path.exists(checkpoint_path):
+        # scan complet : le prochain repart de zéro
+        os.remove(checkpoint_path)
+
+    return {
+        "scanned": scanned,
+        "skipped": len(channels) - len(todo),
+        "failed": failed,
+        "quota_used": dict(limiter.used),
+    }
+
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max_results", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=SCAN_CONCURRENCY)
+    parser.add_argument("--fresh", action="store_true", help="ignore le checkpoint existant")
+    args = parser.parse_args()
+
     print("\n=== SEEDED BUSINESS US SCAN ===\n")
-    now = datetime.now(timezone.utc)
-
-    for name, cid in SEED_CHANNELS.items():
-        print(f"\n--- {name} ---")
-        items = list_channel_videos(cid, max_results=25)
-
-        for v in items:
-            vid = v["id"]
-            title = v["snippet"]["title"]
-            stats = v.get("statistics", {})
-            views = int(stats.get("viewCount", 0))
-            likes = int(stats.get("likeCount", 0))
-
-            save_video({
-                "id": vid,
-                "title": title,
-                "channel": name,
-                "publishedAt": v["snippet"].get("publishedAt"),
-                "views": views,
-                "likes": likes,
-            })
-            save_snapshot(vid, views=views, likes=likes, comments=int(stats.get("commentCount", 0)))
-
-            print(f"{views} views | {likes} likes | {title}")
+    summary = scan(SEED_CHANNELS, max_results=args.max_results, workers=args.workers, fresh=args.fresh)
+    print("\n", json.dumps(summary, ensure_ascii=False))
+
+    if summary["scanned"]:
+        print(f"Intel presets refreshed: {refresh_presets()}")
 
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
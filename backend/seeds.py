@@ -0,0 +1,2 @@
+# Chaînes business US suivies par seed_scan : {nom affiché: channel_id (UC...)}
+SEED_CHANNELS = {}
@@ -1,5 +1,5 @@
 from .youtube import search_business_us, get_video_stats
-from .storage import save_video, save_snapshot
+from .storage import save_video, save_snapshot, flush
 
 def run_snapshot():
     results = search_business_us()
@@ -25,5 +25,7 @@ def run_snapshot():
 
         print(f"{views} views | {title}")
 
+    flush()
+
 if __name__ == "__main__":
     run_snapshot()
\ No newline at end of file
@@ -0,0 +1,275 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, time as dt_time, timezone, timedelta
+from typing import Dict, List, Optional, Set
+
+from .snapshot_store import get_store
+from .velocity import video_metrics
+from .youtube import get_videos, MAX_IDS_PER_CALL
+from .storage import save_snapshot, flush as flush_storage
+from .quota import QuotaLimiter, QuotaExceeded, QuotaWaitCancelled
+
+# Daemon de re-snapshot : au lieu de tout re-scanner à la main au même rythme,
+# chaque vidéo a sa prochaine échéance = dernier snapshot + intervalle dérivé de
+# sa vélocité récente (vpd_24h, sinon 7d, sinon premier/dernier) :
+#   >= SCHED_FAST_VPD vues/jour -> toutes les SCHED_MIN_INTERVAL_H (1h)
+#   <= SCHED_SLOW_VPD vues/jour -> toutes les SCHED_MAX_INTERVAL_H (1 semaine)
+#   entre les deux : interpolation géométrique ; vidéo à 1 snapshot -> SCHED_NEW_INTERVAL_H.
+# File de priorité (heap) sur l'échéance ; les ids dus partent par paquets de
+# 50 (videos.list = 1 unité / paquet), avec un QuotaLimiter dédié : budget
+# quotidien (remis à zéro à minuit heure du Pacifique, comme le quota de l'API)
+# étalé sur la journée.
+# L'état est dérivé du SnapshotStore : un redémarrage reprend les échéances.
+#
+#   python -m backend.snapshot_scheduler              # daemon
+#   python -m backend.snapshot_scheduler --once       # un passage sur les vidéos dues
+#   python -m backend.snapshot_scheduler --plan       # échéances + coût estimé, sans appel API
+
+HOUR_S = 3600.0
+
+# Le quota YouTube Data API repart à minuit, heure du Pacifique
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except (ImportError, KeyError):   # pas de base tz (Windows sans tzdata) : PST fixe
+    QUOTA_TZ = timezone(timedelta(hours=-8))
+
+SCHED_MIN_INTERVAL_H = float(os.getenv("SCHED_MIN_INTERVAL_H", "1"))
+SCHED_MAX_INTERVAL_H = float(os.getenv("SCHED_MAX_INTERVAL_H", "168"))
+SCHED_NEW_INTERVAL_H = float(os.getenv("SCHED_NEW_INTERVAL_H", "6"))
+SCHED_FAST_VPD = float(os.getenv("SCHED_FAST_VPD", "20000"))
+SCHED_SLOW_VPD = float(os.getenv("SCHED_SLOW_VPD", "200"))
+SCHED_DAILY_QUOTA = int(os.getenv("SCHED_DAILY_QUOTA", "2000"))
+SCHED_QUOTA_BURST = float(os.getenv("SCHED_QUOTA_BURST", "50"))
+SCHED_MAX_BATCH_IDS = int(os.getenv("SCHED_MAX_BATCH_IDS", "500"))   # ids par passage (10 paquets)
+SCHED_TICK_S = float(os.getenv("SCHED_TICK_S", "30"))
+
+
+def interval_for(vpd: Optional[float]) -> float:
+    """Intervalle de re-snapshot (secondes) pour une vélocité en vues/jour (None = inconnue)."""
+    lo, hi = SCHED_MIN_INTERVAL_H * HOUR_S, SCHED_MAX_INTERVAL_H * HOUR_S
+    if vpd is None:
+        return SCHED_NEW_INTERVAL_H * HOUR_S
+    if vpd >= SCHED_FAST_VPD:
+        return lo
+    if vpd <= SCHED_SLOW_VPD:
+        return hi
+    f = (math.log(SCHED_FAST_VPD) - math.log(vpd)) / (math.log(SCHED_FAST_VPD) - math.log(SCHED_SLOW_VPD))
+    return lo * (hi / lo) ** f
+
+
+def recent_vpd(m: Dict[str, float]) -> Optional[float]:
+    if m["snapshots"] < 2:
+        return None
+    for k in ("vpd_24h", "vpd_7d", "views_per_day"):
+        if m[k] > 0:
+            return m[k]
+    return 0.0
+
+
+def _daily_limiter(budget: int, stop: Optional[threading.Event] = None) -> QuotaLimiter:
+    # débit = budget / 24h : un arriéré ne vide pas tout le quota dès minuit
+    return QuotaLimiter(units_per_sec=budget / 86400.0, burst=SCHED_QUOTA_BURST, budget=budget, stop=stop)
+
+
+def quota_day(now: Optional[datetime] = None):
+    return (now or datetime.now(timezone.utc)).astimezone(QUOTA_TZ).date()
+
+
+def seconds_until_quota_reset(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    reset = datetime.combine(quota_day(now) + timedelta(days=1), dt_time(0), tzinfo=QUOTA_TZ)
+    # via timestamp : une soustraction entre datetimes du même tzinfo ignorerait le changement d'heure
+    return max(0.0, reset.timestamp() - now.timestamp())
+
+
+class SnapshotScheduler:
+    def __init__(self, daily_quota: int = SCHED_DAILY_QUOTA, max_batch_ids: int = SCHED_MAX_BATCH_IDS,
+                 store=None):
+        self.daily_quota = daily_quota
+        self.max_batch_ids = max_batch_ids
+        self.store = store or get_store()
+        self._heap: List[tuple] = []               # (due_epoch_s, video_id), entrées périmées ignorées
+        self._due: Dict[str, float] = {}           # video_id -> échéance courante
+        self._gone: Set[str] = set()               # ids absents de l'API (supprimés / privés)
+        self._day = None
+        self.limiter: Optional[QuotaLimiter] = None
+        self._stop = threading.Event()
+        self.stats = {"snapshots": 0, "calls": 0, "gone": 0}
+
+    # ----- file -----
+
+    def _push(self, vid: str, due: float) -> None:
+        self._due[vid] = due
+        heapq.heappush(self._heap, (due, vid))
+
+    def sync(self, only: Optional[Set[str]] = None) -> int:
+        """
+        (Re)calcule l'échéance depuis le store : nouvelles vidéos, et `only` (vidéos
+        qui viennent d'être snapshotées). Retourne le nombre de vidéos (re)planifiées.
+        """
+        snaps = self.store.snapshots()
+        metrics = video_metrics(snaps, rolling=True)
+        n = 0
+        for vid in metrics.ids:
+            if vid in self._gone or (vid in self._due and (only is None or vid not in only)):
+                continue
+            i = metrics.index[vid]
+            m = metrics.get(vid)
+            last_s = float(metrics.last_ts[i]) / 1e6 if m["snapshots"] else time.time()
+            self._push(vid, last_s + interval_for(recent_vpd(m)))
+            n += 1
+        return n
+
+    def pop_due(self, now: float, limit: int) -> List[str]:
+        ids = []
+        while self._heap and len(ids) < limit:
+            due, vid = self._heap[0]
+            if self._due.get(vid) != due:
+                heapq.heappop(self._heap)          # entrée remplacée
+                continue
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            del self._due[vid]
+            ids.append(vid)
+        return ids
+
+    def next_due(self) -> Optional[float]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    # ----- quota -----
+
+    def _limiter(self) -> QuotaLimiter:
+        today = quota_day()
+        if self.limiter is None or today != self._day:
+            self._day = today
+            self.limiter = _daily_limiter(self.daily_quota, stop=self._stop)
+        return self.limiter
+
+    def _affordable_ids(self) -> int:
+        limiter = self._limiter()
+        left = limiter.budget - limiter.total_used
+        return max(0, min(self.max_batch_ids, left * MAX_IDS_PER_CALL))
+
+    # ----- passage -----
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Snapshot des vidéos dues (dans la limite du quota). Retourne le nombre de snapshots."""
+        now = time.time() if now is None else now
+        ids = self.pop_due(now, self._affordable_ids())
+        if not ids:
+            return 0
+
+        try:
+            items = get_videos(ids, part="statistics", limiter=self._limiter())
+        except (QuotaExceeded, QuotaWaitCancelled) as e:
+            # remises en file telles quelles : reprise au prochain jour de quota / redémarrage
+            for vid in ids:
+                self._push(vid, now)
+            if isinstance(e, QuotaWaitCancelled):
+                return 0
+            raise
+        self.stats["calls"] += math.ceil(len(ids) / MAX_IDS_PER_CALL)
+
+        for vid in ids:
+            item = items.get(vid)
+            if item is None:
+                self._gone.add(vid)
+                self.stats["gone"] += 1
+                continue
+            stats = item.get("statistics", {})
+            save_snapshot(vid, views=int(stats.get("viewCount", 0)), likes=int(stats.get("likeCount", 0)),
+                          comments=int(stats.get("commentCount", 0)))
+        flush_storage()
+
+        fetched = set(items)
+        self.stats["snapshots"] += len(fetched)
+        self.sync(only=fetched)
+        return len(fetched)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self, tick_s: float = SCHED_TICK_S) -> None:
+        self.sync()
+        print(f"[scheduler] {len(self._due)} videos scheduled, daily quota {self.daily_quota} units")
+        while not self._stop.is_set():
+            try:
+                self.sync()                       # vidéos ajoutées par un scan entre-temps
+                n = self.run_due()
+                if n:
+                    print(f"[scheduler] {n} snapshots | quota {self._limiter().total_used}/{self.daily_quota}")
+            except QuotaExceeded as e:
+                wait = seconds_until_quota_reset()
+                print(f"[scheduler] {e} -> pause until the quota reset, midnight Pacific ({wait / 3600:.1f}h)")
+                self._stop.wait(wait)
+                continue
+            except Exception as e:
+                print(f"[scheduler] pass failed: {type(e).__name__}: {e}")
+
+            nxt = self.next_due()
+            wait = tick_s if nxt is None else min(tick_s, max(1.0, nxt - time.time()))
+            if self._due_now():
+                wait = 1.0                        # arriéré : enchaîner les paquets
+            self._stop.wait(wait)
+
+    def _due_now(self) -> bool:
+        nxt = self.next_due()
+        return nxt is not None and nxt <= time.time() and self._affordable_ids() > 0
+
+    def plan(self, horizon_h: float = 24.0) -> Dict[str, object]:
+        """Échéances dans l'horizon + coût quota estimé (aucun appel API)."""
+        self.sync()
+        now = time.time()
+        dues = sorted(self._due.values())
+        in_horizon = [d for d in dues if d <= now + horizon_h * HOUR_S]
+        buckets = {"overdue": 0, "<1h": 0, "<6h": 0, "<24h": 0, "later": 0}
+        for d in dues:
+            dt = d - now
+            key = "overdue" if dt <= 0 else "<1h" if dt < HOUR_S else "<6h" if dt < 6 * HOUR_S else \
+                "<24h" if dt < 24 * HOUR_S else "later"
+            buckets[key] += 1
+        # borne basse : les vidéos rapides repasseront plusieurs fois dans l'horizon
+        return {
+            "videos": len(dues),
+            "due": buckets,
+            "due_in_horizon": len(in_horizon),
+            "est_units": math.ceil(len(in_horizon) / MAX_IDS_PER_CALL),
+            "daily_quota": self.daily_quota,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-snapshot adaptatif (vélocité) sous budget de quota")
+    parser.add_argument("--daily_quota", type=int, default=SCHED_DAILY_QUOTA)
+    parser.add_argument("--max_batch_ids", type=int, default=SCHED_MAX_BATCH_IDS)
+    parser.add_argument("--tick", type=float, default=SCHED_TICK_S)
+    parser.add_argument("--once", action="store_true", help="un seul passage sur les vidéos dues")
+    parser.add_argument("--plan", action="store_true", help="affiche les échéances sans appel API")
+    args = parser.parse_args()
+
+    sched = SnapshotScheduler(daily_quota=args.daily_quota, max_batch_ids=args.max_batch_ids)
+    if args.plan:
+        print(json.dumps(sched.plan(), ensure_ascii=False, indent=2))
+        return
+    if args.once:
+        sched.sync()
+        print(f"{sched.run_due()} snapshots", json.dumps(sched.stats))
+        return
+
+    try:
+        sched.run_forever(args.tick)
+    except KeyboardInterrupt:
+        print("\n", json.dumps(sched.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import bisect
+import json
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+from .storage import VIDEOS_FILE, SNAPSHOT_FILE, add_write_listener
+from .columnar import ColumnBuffer, SnapshotColumns
+
+# Store partagé (process-wide) : on charge les JSONL une fois, puis on ne lit
+# que les nouvelles lignes (suivi offset + inode) au lieu de tout re-parser à
+# chaque requête.
+
+
+class JsonlTail:
+    """Suit un fichier JSONL append-only et ne renvoie que les lignes ajoutées."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inode = None
+        self.offset = 0
+
+    def read_new(self):
+        """
+        Retourne (reset, records).
+        reset=True si le fichier a été remplacé (inode) ou tronqué : il faut
+        alors repartir de zéro côté appelant.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            reset = self.inode is not None
+            self.inode, self.offset = None, 0
+            return reset, []
+
+        reset = False
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            reset = self.inode is not None
+            self.inode = st.st_ino
+            self.offset = 0
+
+        if st.st_size == self.offset:
+            return reset, []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+
+        # On ne consomme que des lignes complètes (un writer peut être en train d'écrire)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return reset, []
+        self.offset += end + 1
+
+        records = []
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                records.append(json.loads(line))
+        return reset, records
+
+
+def _ts(s: Dict[str, Any]) -> str:
+    return s["timestamp"]
+
+
+class SnapshotStore:
+    """
+    videos: {video_id: dernier record vidéo}
+    snapshots: {video_id: [snapshots triés par timestamp]}
+
+    Les dicts/listes renvoyés sont en lecture seule pour les appelants :
+    un refresh construit de nouveaux objets (copy-on-write) puis remplace la
+    référence, donc un lecteur n'est jamais impacté par une ingestion en cours.
+
+    Des listeners (on_reset / on_videos / on_snapshots) reçoivent les nouvelles
+    lignes à chaque ingestion, pour maintenir des vues incrémentales.
+    """
+
+    def __init__(self, videos_file: str = VIDEOS_FILE, snapshot_file: str = SNAPSHOT_FILE):
+        self._lock = threading.Lock()
+        self._videos_tail = JsonlTail(videos_file)
+        self._snaps_tail = JsonlTail(snapshot_file)
+        self._videos: Dict[str, Dict[str, Any]] = {}
+        self._snaps: Dict[str, List[Dict[str, Any]]] = {}
+        self._listeners = []
+        self.version = 0
+        # colonnes parsées tenues à jour avec _snaps (O(nouvelles lignes) par refresh)
+        self._columns = ColumnBuffer()
+        _STORES.add(self)
+
+    def subscribe(self, listener) -> None:
+        """Ajoute un listener et lui rejoue l'état courant."""
+        with self._lock:
+            self._listeners.append(listener)
+            self._replay(listener)
+
+    def _replay(self, listener) -> None:
+        listener.on_reset()
+        listener.on_videos(list(self._videos.values()))
+        listener.on_snapshots([s for lst in self._snaps.values() for s in lst])
+
+    def refresh(self) -> bool:
+        """Ingère les nouvelles lignes des deux fichiers. Retourne True si quelque chose a changé."""
+        with self._lock:
+            changed = False
+
+            reset_videos, video_recs = self._videos_tail.read_new()
+            if reset_videos or video_recs:
+                videos = {} if reset_videos else dict(self._videos)
+                for v in video_recs:
+                    videos[v["id"]] = v
+                self._videos = videos
+                changed = True
+
+            reset_snaps, snap_recs = self._snaps_tail.read_new()
+            if reset_snaps or snap_recs:
+                snaps = {} if reset_snaps else dict(self._snaps)
+                touched: Dict[str, List[Dict[str, Any]]] = {}
+                for s in snap_recs:
+                    vid = s["video_id"]
+                    lst = touched.get(vid)
+                    if lst is None:
+                        lst = touched[vid] = list(snaps.get(vid, ()))
+                    if not lst or _ts(lst[-1]) <= _ts(s):
+                        lst.append(s)
+                    else:
+                        bisect.insort(lst, s, key=_ts)
+                snaps.update(touched)
+                self._snaps = snaps
+                if reset_snaps:
+                    self._columns.reset()
+                self._columns.extend(snap_recs)
+                changed = True
+
+            if changed:
+                self.version += 1
+                for listener in self._listeners:
+                    if reset_snaps or reset_videos:
+                        self._replay(listener)
+                    else:
+                        listener.on_videos(video_recs)
+                        listener.on_snapshots(snap_recs)
+            return changed
+
+    def videos(self) -> Dict[str, Dict[str, Any]]:
+        self.refresh()
+        return self._videos
+
+    def snapshots(self) -> Dict[str, List[Dict[str, Any]]]:
+        self.refresh()
+        return self._snaps
+
+    def columns_for(self, snaps) -> Optional[SnapshotColumns]:
+        """Colonnes de `snaps` si c'est le dict courant du store, sinon None."""
+        with self._lock:
+            if snaps is not self._snaps:
+                return None
+            return self._columns.columns()
+
+
+# Stores vivants : velocity retrouve les colonnes déjà parsées d'un dict de snapshots
+_STORES: "weakref.WeakSet[SnapshotStore]" = weakref.WeakSet()
+
+
+def columns_for(snaps) -> Optional[SnapshotColumns]:
+    for store in list(_STORES):
+        cols = store.columns_for(snaps)
+        if cols is not None:
+            return cols
+    return None
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> SnapshotStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = SnapshotStore()
+                # écritures locales (save_video/save_snapshot) -> ingestion immédiate
+                add_write_listener(_STORE.refresh)
+    return _STORE
@@ -1,16 +1,285 @@
+import atexit
 import json
 import os
+import threading
+import time
 from datetime import datetime, timezone
 
+from . import db
+
+try:
+    import fcntl
+except ImportError:  # Windows : on garde le verrou intra-process seulement
+    fcntl = None
+
 DATA_DIR = "data"
 VIDEOS_FILE = os.path.join(DATA_DIR, "videos.jsonl")
 SNAPSHOT_FILE = os.path.join(DATA_DIR, "snapshots.jsonl")
 
+# Flush quand le buffer atteint N lignes ou que la plus ancienne a plus de X s
+FLUSH_MAX_RECORDS = int(os.getenv("STORAGE_FLUSH_MAX_RECORDS", "500"))
+FLUSH_INTERVAL_S = float(os.getenv("STORAGE_FLUSH_INTERVAL_S", "1.0"))
+FSYNC = os.getenv("STORAGE_FSYNC", "1") != "0"
+
 os.makedirs(DATA_DIR, exist_ok=True)
 
-def save_video(video: dict) -> None:
-    with open(VIDEOS_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(video, ensure_ascii=False) + "\n")
+# Callbacks appelés après chaque écriture (ex. store en mémoire -> ingestion immédiate)
+_write_listeners = []
+
+def add_write_listener(fn) -> None:
+    _write_listeners.append(fn)
+
+def _notify_write() -> None:
+    for fn in _write_listeners:
+        fn()
+
+
+class JsonlWriter:
+    """
+    Writer JSONL bufferisé : handle gardé ouvert (O_APPEND), lignes accumulées
+    en mémoire puis écrites en un seul write + fsync.
+    Thread-safe : _lock ne protège que le buffer (append ne bloque jamais sur
+    le disque), _write_lock sérialise les écritures (fd, ordre des lots) ;
+    multi-process via flock pendant l'écriture, et O_APPEND garantit que les
+    lignes de deux process ne s'entrelacent pas.
+    Si le fichier est remplacé (compaction, rotation), il est rouvert.
+    sink(records) reçoit chaque lot écrit (ex: tables SQLite).
+    """
+
+    def __init__(self, path: str, max_records: int = FLUSH_MAX_RECORDS, fsync: bool = FSYNC, sink=None):
+        self.path = path
+        self.sink = sink
+        self.max_records = max_records
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buf = []
+        self._first_at = None
+        self._fd = None
+        self._ino = None
+        # le JSONL fait foi ; un miroir SQLite qui diverge doit se voir (storage_stats)
+        self.sink_failures = 0
+        self.last_sink_error = None
+
+    def append(self, record: dict) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if not self._buf:
+                self._first_at = time.monotonic()
+            self._buf.append((line, record))
+            full = len(self._buf) >= self.max_records
+        # seuil atteint : on écrit, sauf si une écriture est déjà en cours (elle
+        # ou la suivante emportera ces lignes) -> l'appelant n'attend pas le disque
+        if full and self._write_lock.acquire(blocking=False):
+            try:
+                wrote = self._write_batch()
+            finally:
+                self._write_lock.release()
+            if wrote:
+                _notify_write()
+
+    def due(self, now: float) -> bool:
+        first = self._first_at
+        return first is not None and now - first >= FLUSH_INTERVAL_S
+
+    def _open(self) -> int:
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fd is not None and ino != self._ino:
+            os.close(self._fd)
+            self._fd = None
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._ino = os.fstat(self._fd).st_ino
+        return self._fd
+
+    def _lock_file(self) -> int:
+        """Ouvre + flock ; si le fichier a été remplacé entre-temps (compaction), on rouvre."""
+        while True:
+            fd = self._open()
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == self._ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def flush(self) -> bool:
+        with self._write_lock:
+            wrote = self._write_batch()
+        if wrote:
+            _notify_write()
+        return wrote
+
+    def _write_batch(self) -> bool:
+        # appelé sous _write_lock ; _lock juste le temps d'échanger le buffer
+        with self._lock:
+            if not self._buf:
+                return False
+            batch = self._buf
+            self._buf = []
+            self._first_at = None
+
+        data = b"".join(line for line, _ in batch)
+        fd = self._lock_file()
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+        if self.sink is not None:
+            try:
+                self.sink([r for _, r in batch])
+            except Exception as e:
+                # le JSONL fait foi : `python -m backend.timeseries import` rattrape
+                self.sink_failures += 1
+                self.last_sink_error = f"{type(e).__name__}: {e}"
+                print(f"[storage] sink failed for {self.path} ({self.sink_failures} failures): {self.last_sink_error}")
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._buf)
+        return {
+            "path": self.path,
+            "pending": pending,
+            "sink_failures": self.sink_failures,
+            "last_sink_error": self.last_sink_error,
+        }
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._write_batch()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+# Double écriture : JSONL (tail du SnapshotStore, export) + tables SQLite (requêtes indexées)
+SQLITE_SINK = os.getenv("STORAGE_SQLITE_SINK", "1") != "0"
+
+
+def _videos_sink(records) -> None:
+    db.ensure_timeseries()
+    db.upsert_videos(records)
+
+
+def _snapshots_sink(records) -> None:
+    db.ensure_timeseries()
+    db.insert_snapshots(records)
+
+
+_video_writer = JsonlWriter(VIDEOS_FILE, sink=_videos_sink if SQLITE_SINK else None)
+_snapshot_writer = JsonlWriter(SNAPSHOT_FILE, sink=_snapshots_sink if SQLITE_SINK else None)
+_WRITERS = (_video_writer, _snapshot_writer)
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_INTERVAL_S / 4)
+        now = time.monotonic()
+        for w in _WRITERS:
+            if w.due(now):
+                try:
+                    w.flush()
+                except Exception as e:
+                    print(f"[storage] flush failed for {w.path}: {e}")
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_loop, name="jsonl-flusher", daemon=True)
+                _flusher.start()
+
+
+def flush() -> None:
+    """Écrit tout ce qui est en attente (fin de scan, avant lecture des JSONL)."""
+    for w in _WRITERS:
+        w.flush()
+
+
+atexit.register(flush)
+
+
+def storage_stats() -> dict:
+    """Lignes en attente et échecs du miroir SQLite, par fichier."""
+    return {os.path.basename(w.path): w.stats() for w in _WRITERS}
+
+
+class VideoCatalog:
+    """
+    Index {video_id: dernier record} de videos.jsonl, chargé une fois par process.
+    Upsert : le record est fusionné avec l'existant et n'est écrit que si un
+    champ de CATALOG_KEYS change (les stats vont dans snapshots.jsonl).
+    """
+
+    CATALOG_KEYS = ("title", "channel", "publishedAt")
+
+    def __init__(self, path: str = VIDEOS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = None
+
+    def _load(self) -> dict:
+        records = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        v = json.loads(line)
+                        records[v["id"]] = v
+        except FileNotFoundError:
+            pass
+        return records
+
+    def upsert(self, video: dict):
+        """Retourne le record fusionné à écrire, ou None si rien n'a changé."""
+        with self._lock:
+            if self._records is None:
+                self._records = self._load()
+            old = self._records.get(video["id"])
+            if old is not None and all(
+                video.get(k, old.get(k)) == old.get(k) for k in self.CATALOG_KEYS
+            ):
+                return None
+            merged = {**old, **video} if old is not None else dict(video)
+            self._records[video["id"]] = merged
+            return merged
+
+    def invalidate(self) -> None:
+        """À appeler si le fichier a été réécrit par un autre process."""
+        with self._lock:
+            self._records = None
+
+
+_catalog = VideoCatalog()
+
+
+def save_video(video: dict) -> bool:
+    """Upsert dans le catalogue ; True si une ligne a été écrite."""
+    record = _catalog.upsert(video)
+    if record is None:
+        return False
+    _ensure_flusher()
+    _video_writer.append(record)
+    return True
 
 def save_snapshot(video_id: str, views: int, likes: int, comments: int) -> None:
     snap = {
@@ -20,5 +289,5 @@ def save_snapshot(video_id: str, views: int, likes: int, comments: int) -> None:
         "comments": int(comments),
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
-    with open(SNAPSHOT_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(snap, ensure_ascii=False) + "\n")
\ No newline at end of file
+    _ensure_flusher()
+    _snapshot_writer.append(snap)
@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+
+from . import db
+from .storage import VIDEOS_FILE, SNAPSHOT_FILE
+
+# Tables SQLite videos/snapshots (data/plans.db) <-> JSONL.
+#   python -m backend.timeseries import            # backfill depuis les JSONL
+#   python -m backend.timeseries export --out DIR  # JSONL depuis SQLite
+#   python -m backend.timeseries top --min_vpd 20000 --start 2025-01-01
+
+BATCH = 5000
+
+
+def _batched_jsonl(path: str):
+    batch = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    batch.append(json.loads(line))
+                    if len(batch) >= BATCH:
+                        yield batch
+                        batch = []
+    except FileNotFoundError:
+        pass
+    if batch:
+        yield batch
+
+
+def import_jsonl(videos_file: str = VIDEOS_FILE, snapshot_file: str = SNAPSHOT_FILE):
+    db.ensure_timeseries()
+    n_videos = n_snaps = 0
+    for batch in _batched_jsonl(videos_file):
+        db.upsert_videos(batch)
+        n_videos += len(batch)
+    for batch in _batched_jsonl(snapshot_file):
+        db.insert_snapshots(batch)
+        n_snaps += len(batch)
+    return n_videos, n_snaps
+
+
+def export_jsonl(out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+    n_videos = n_snaps = 0
+    with open(os.path.join(out_dir, "videos.jsonl"), "w", encoding="utf-8") as f:
+        for v in db.iter_videos():
+            f.write(json.dumps(v, ensure_ascii=False) + "\n")
+            n_videos += 1
+    with open(os.path.join(out_dir, "snapshots.jsonl"), "w", encoding="utf-8") as f:
+        for s in db.iter_snapshots():
+            f.write(json.dumps(s, ensure_ascii=False) + "\n")
+            n_snaps += 1
+    return n_videos, n_snaps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("import")
+    p_export = sub.add_parser("export")
+    p_export.add_argument("--out", default=os.path.join("data", "export"))
+    p_top = sub.add_parser("top")
+    p_top.add_argument("--min_vpd", type=float, default=20000)
+    p_top.add_argument("--start", default="")
+    p_top.add_argument("--end", default="9999")
+    p_top.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.cmd == "import":
+        n_videos, n_snaps = import_jsonl()
+        print(f"Imported {n_videos} video rows, {n_snaps} snapshot rows")
+    elif args.cmd == "export":
+        n_videos, n_snaps = export_jsonl(args.out)
+        print(f"Exported {n_videos} videos, {n_snaps} snapshots -> {args.out}")
+    else:
+        db.ensure_timeseries()
+        for r in db.videos_above_vpd(args.min_vpd, args.start, args.end, args.limit):
+            print(f"{int(r['views_per_day'])} v/day | {r['video_id']} | {r['first_ts']} -> {r['last_ts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import bisect
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Instrumentation des apps FastAPI (backend/api.py, backend/main.py, main.py) :
+# - span("winners") autour d'une étape du pipeline : durée ajoutée à la requête
+#   en cours (contextvar, suit aussi le threadpool et les jobs) et à l'histogramme
+#   de l'étape, même hors requête (jobs, CLI) ;
+# - TimingMiddleware : header Server-Timing (spans + total) et histogramme de
+#   latence par route ;
+# - GET /metrics : histogrammes au format texte Prometheus ;
+# - profiler par échantillonnage (opt-in, PROFILE_SLOW_MS > 0) : piles des
+#   threads de la requête, écrites au format "folded" (flamegraph.pl, speedscope)
+#   quand la requête dépasse le seuil.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_HZ = float(os.getenv("PROFILE_HZ", "100"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [compte par bucket (+Inf en dernier), somme, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(s[0]), s[1], s[2]) for labels, s in sorted(self._series.items())]
+        for labels, counts, total, n in series:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cum = 0
+            for le, c in zip(self.buckets, counts):
+                cum += c
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le:g}"}} {cum}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {n}')
+            lines.append(f"{self.name}_sum{{{base}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {n}")
+        return lines
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Latence des requêtes HTTP par route.",
+                            ("method", "route", "status"))
+STAGE_LATENCY = Histogram("pipeline_stage_duration_seconds", "Durée des étapes du pipeline (spans).",
+                          ("stage",))
+
+
+class _Request:
+    __slots__ = ("spans", "threads", "samples")
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+        self.threads = {threading.get_ident()}
+        self.samples: Counter = Counter()
+
+    def server_timing(self, total_s: float) -> str:
+        # une entrée par étape (durées cumulées si l'étape se répète), puis le total
+        agg: Dict[str, float] = {}
+        for name, dur in self.spans:
+            agg[name] = agg.get(name, 0.0) + dur
+        parts = [f"{name};dur={dur * 1000:.1f}" for name, dur in agg.items()]
+        parts.append(f"total;dur={total_s * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_CURRENT: contextvars.ContextVar[Optional[_Request]] = contextvars.ContextVar("timing_request", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Chronomètre une étape ; name = token Server-Timing ([a-z0-9_])."""
+    rec = _CURRENT.get()
+    if rec is not None:
+        # thread de travail (threadpool, job) : échantillonné par le profiler
+        rec.threads.add(threading.get_ident())
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dur = time.perf_counter() - t0
+        STAGE_LATENCY.observe((name,), dur)
+        if rec is not None:
+            rec.spans.append((name, dur))
+
+
+# ----- profiler -----
+
+def _fold(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class SamplingProfiler:
+    """Un thread échantillonne (sys._current_frames) les threads des requêtes en cours."""
+
+    def __init__(self, hz: float = PROFILE_HZ):
+        self.interval = 1.0 / hz
+        self._active: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def begin(self, rec: _Request) -> None:
+        with self._lock:
+            self._active.add(rec)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="timing-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self, rec: _Request) -> None:
+        with self._lock:
+            self._active.discard(rec)
+
+    def _loop(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            frames = sys._current_frames()
+            for rec in active:
+                for tid in list(rec.threads):
+                    frame = frames.get(tid)
+                    if frame is not None and tid != me:
+                        rec.samples[_fold(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_PROFILER = SamplingProfiler() if PROFILE_SLOW_MS > 0 else None
+
+
+def _dump_profile(rec: _Request, method: str, route: str, elapsed_s: float) -> Optional[str]:
+    if not rec.samples:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^a-zA-Z0-9]+", "_", route).strip("_") or "root"
+    path = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{method}_{slug}_{elapsed_s * 1000:.0f}ms.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in rec.samples.most_common():
+            f.write(f"{stack} {n}\n")
+    print(f"[timing] slow request {method} {route} {elapsed_s * 1000:.0f}ms -> {path}")
+    return path
+
+
+# ----- ASGI -----
+
+class TimingMiddleware:
+    """Middleware ASGI pur (compatible StreamingResponse : les spans émis pendant le stream vont dans /metrics)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rec = _Request()
+        token = _CURRENT.set(rec)
+        if _PROFILER is not None:
+            _PROFILER.begin(rec)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", rec.server_timing(time.perf_counter() - t0).encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _CURRENT.reset(token)
+            # gabarit de la route (/plans/{plan_id}) : cardinalité bornée
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.observe((scope["method"], route, str(status)), elapsed)
+            if _PROFILER is not None:
+                _PROFILER.end(rec)
+                if elapsed * 1000 >= PROFILE_SLOW_MS:
+                    _dump_profile(rec, scope["method"], route, elapsed)
+
+
+def render_metrics() -> str:
+    return "\n".join(REQUEST_LATENCY.render() + STAGE_LATENCY.render()) + "\n"
+
+
+def install(app) -> None:
+    """Middleware de timing + GET /metrics sur une app FastAPI."""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(TimingMiddleware)
+
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
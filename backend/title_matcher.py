@@ -0,0 +1,156 @@
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, Optional
+
+# Matcher compilé : une seule regex pour tous les mots-clés "substring"
+# (blocklist, whitelist business, mots-clés de peur) + un index mot -> leviers
+# pour les labels (qui eux matchent sur les tokens).
+#
+# Astuce : (?=(trie des mots-clés)) — la regex est générée depuis un trie
+# (préfixes factorisés, suffixes optionnels gloutons) et capture, à chaque
+# position, le mot-clé le plus long qui commence là.
+# Tout autre mot-clé qui commence à la même position en est forcément un
+# préfixe : on le retrouve via une fermeture "préfixes" précalculée. On obtient
+# donc exactement l'ensemble des `kw in title` en un seul passage sur le texte.
+
+TitleInfo = namedtuple("TitleInfo", ["blocked", "business", "labels", "fear_scores", "fear_primary"])
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def normalize_title(title: str) -> str:
+    t = html.unescape(title or "").lower().strip()
+    return t.replace("’", "'")
+
+
+def _trie_regex(words) -> str:
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node) -> str:
+        terminal = "" in node
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 and len(alts[0]) == 1 else "(?:" + "|".join(alts) + ")"
+        # suffixe optionnel glouton : on préfère le mot-clé le plus long
+        return body + "?" if terminal else body
+
+    return build(trie)
+
+
+def title_hash(title: str) -> bytes:
+    return hashlib.blake2b((title or "").encode("utf-8"), digest_size=8).digest()
+
+
+class TitleMatcher:
+    def __init__(
+        self,
+        block_words: Iterable[str] = (),
+        business_words: Iterable[str] = (),
+        lex: Optional[Dict[str, Iterable[str]]] = None,
+        fears: Optional[Dict[str, dict]] = None,
+        stopwords: Iterable[str] = (),
+        normalize=normalize_title,
+        cache_size: int = 200_000,
+    ):
+        self.normalize = normalize
+        self.fear_keys = list((fears or {}).keys())
+        self.stopwords = set(stopwords)
+
+        # pattern -> [(catégorie, poids)]
+        tags: Dict[str, list] = {}
+        for w in block_words:
+            tags.setdefault(w, []).append(("blocked", 1))
+        for w in business_words:
+            tags.setdefault(w, []).append(("business", 1))
+        for fk, meta in (fears or {}).items():
+            for kw in meta["keywords"]:
+                # une expression (avec espace) compte double
+                tags.setdefault(kw, []).append((fk, 2 if " " in kw else 1))
+        self._tags = tags
+
+        patterns = sorted(tags)
+        self._regex = re.compile("(?=(" + _trie_regex(patterns) + "))") if patterns else None
+        self._prefixes = {p: [q for q in patterns if p.startswith(q)] for p in patterns}
+
+        # mot -> labels (match sur tokens, comme multi_labels)
+        self._lex_index: Dict[str, list] = {}
+        for label, words in (lex or {}).items():
+            for w in words:
+                self._lex_index.setdefault(w, []).append(label)
+
+        self._cache: "OrderedDict[bytes, TitleInfo]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def scan(self, title: str) -> TitleInfo:
+        """Classification complète d'un titre (sans cache)."""
+        t = self.normalize(title)
+
+        hits = set()
+        if self._regex is not None:
+            for m in self._regex.finditer(t):
+                hits.update(self._prefixes[m.group(1)])
+
+        blocked = business = False
+        scores = {fk: 0 for fk in self.fear_keys}
+        for p in hits:
+            for cat, weight in self._tags[p]:
+                if cat == "blocked":
+                    blocked = True
+                elif cat == "business":
+                    business = True
+                else:
+                    scores[cat] += weight
+
+        labels = set()
+        if self._lex_index:
+            for tok in _TOKEN_RE.findall(t):
+                if len(tok) > 2 and tok not in self.stopwords:
+                    labels.update(self._lex_index.get(tok, ()))
+        if not labels:
+            labels.add("other")
+
+        # premier max dans l'ordre de FEARS (même règle que fear_primary)
+        primary, best = "other", 0
+        for fk in self.fear_keys:
+            if scores[fk] > best:
+                primary, best = fk, scores[fk]
+
+        return TitleInfo(blocked, business, tuple(sorted(labels)), scores, primary)
+
+    def classify(self, title: str) -> TitleInfo:
+        """Comme scan(), avec cache indexé par hash du titre : un titre inchangé n'est jamais re-scanné."""
+        key = title_hash(title)
+        info = self._cache.get(key)
+        if info is not None:
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        info = self.scan(title)
+        with self._lock:
+            self._cache[key] = info
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return info
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+        self.hits = self.misses = 0
+
+    def precompute(self, videos: Dict[str, dict]) -> None:
+        """Pré-remplit le cache pour tout le catalogue (ex. au démarrage de l'API)."""
+        for v in videos.values():
+            self.classify(v.get("title", ""))
@@ -0,0 +1,271 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .columnar import SnapshotColumns, build_columns, epoch_us, US_PER_DAY
+from .snapshot_store import columns_for
+
+# Moteur de métriques batch : un seul passage vectorisé (group-by sur les
+# colonnes triées par vidéo/timestamp) au lieu d'un views_per_day par vidéo.
+
+
+class VideoMetrics:
+    """
+    Métriques premier/dernier snapshot pour toutes les vidéos (arrays alignés sur ids).
+    counts, first_ts, last_ts, days, first_views, dviews, dlikes,
+    vpd (views/jour), lpd (likes/jour), growth (dviews / vues initiales).
+    Version rolling : + vpd_24h, vpd_7d, vpd_30d, accel, trend.
+    """
+
+    def __init__(self, ids: List[str], **arrays):
+        self.ids = ids
+        self.index: Dict[str, int] = {vid: i for i, vid in enumerate(ids)}
+        for k, v in arrays.items():
+            setattr(self, k, v)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, video_id: str) -> Optional[Dict[str, float]]:
+        i = self.index.get(video_id)
+        if i is None:
+            return None
+        out = {
+            "snapshots": int(self.counts[i]),
+            "views_per_day": float(self.vpd[i]),
+            "likes_per_day": float(self.lpd[i]),
+            "growth": float(self.growth[i]),
+        }
+        if hasattr(self, "trend"):
+            for k in ("vpd_24h", "vpd_7d", "vpd_30d", "accel", "trend"):
+                out[k] = float(getattr(self, k)[i])
+        return out
+
+
+def compute_metrics(cols: SnapshotColumns) -> VideoMetrics:
+    offsets = np.asarray(cols.offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    n = len(counts)
+
+    first_ts = np.zeros(n, dtype=np.int64)
+    last_ts = np.zeros(n, dtype=np.int64)
+    first_views = np.zeros(n, dtype=np.float64)
+    dviews = np.zeros(n, dtype=np.float64)
+    dlikes = np.zeros(n, dtype=np.float64)
+
+    nonempty = counts > 0
+    if nonempty.any():
+        first = offsets[:-1][nonempty]
+        last = offsets[1:][nonempty] - 1
+        first_ts[nonempty] = cols.ts[first]
+        last_ts[nonempty] = cols.ts[last]
+        first_views[nonempty] = cols.views[first]
+        # float64 avant soustraction : uint64 boucle sur un delta négatif
+        dviews[nonempty] = cols.views[last].astype(np.float64) - first_views[nonempty]
+        dlikes[nonempty] = cols.likes[last].astype(np.float64) - cols.likes[first].astype(np.float64)
+
+    days = np.maximum(1e-6, (last_ts - first_ts) / US_PER_DAY)
+
+    return VideoMetrics(
+        cols.ids,
+        counts=counts,
+        first_ts=first_ts,
+        last_ts=last_ts,
+        days=days,
+        first_views=first_views,
+        dviews=dviews,
+        dlikes=dlikes,
+        vpd=dviews / days,
+        lpd=dlikes / days,
+        growth=dviews / np.maximum(1.0, first_views),
+    )
+
+
+# Fenêtres glissantes (jours) et demi-vie du score de tendance
+WINDOWS = {"24h": 1, "7d": 7, "30d": 30}
+TREND_HALF_LIFE_DAYS = float(os.getenv("VELOCITY_HALF_LIFE_DAYS", "3"))
+
+# Colonnes utilisables pour classer les winners (toutes en vues/jour)
+RANK_MODES = ("vpd", "vpd_24h", "vpd_7d", "vpd_30d", "trend")
+
+_BASE_FIELDS = ("counts", "first_ts", "last_ts", "days", "first_views", "dviews", "dlikes", "vpd", "lpd", "growth")
+
+
+def _window_vpd(cols: SnapshotColumns, keys, uts, last, window_us: int):
+    """
+    Vues/jour sur [t_end - fenêtre, t_end], t_end = dernier snapshot de la vidéo.
+    Vues à t_end - fenêtre interpolées entre les deux snapshots qui l'encadrent ;
+    si la série est plus courte que la fenêtre, on part du premier snapshot.
+    """
+    n = len(last)
+    M = len(uts) + 1
+    first = np.asarray(cols.offsets[:-1], dtype=np.int64)
+    t_end = cols.ts[last]
+    t0 = t_end - window_us
+
+    # dernière ligne de la vidéo avec ts <= t0 : recherche sur la clé (vidéo, rang du ts)
+    r0 = np.searchsorted(uts, t0, side="right") - 1
+    pos = np.searchsorted(keys, np.arange(n, dtype=np.int64) * M + r0, side="right") - 1
+    before = pos >= first
+    pos = np.where(before, pos, first)
+    nxt = np.minimum(pos + 1, last)
+
+    ts_a = cols.ts[pos]
+    ts_b = cols.ts[nxt]
+    v_a = cols.views[pos].astype(np.float64)
+    v_b = cols.views[nxt].astype(np.float64)
+    span = np.maximum(1, ts_b - ts_a)
+    frac = np.where(before & (nxt > pos), (t0 - ts_a) / span, 0.0)
+    base_views = v_a + (v_b - v_a) * frac
+    base_ts = np.where(before, t0, ts_a)
+
+    days = np.maximum(1e-6, (t_end - base_ts) / US_PER_DAY)
+    return (cols.views[last].astype(np.float64) - base_views) / days
+
+
+def compute_rolling_metrics(cols: SnapshotColumns, half_life_days: float = TREND_HALF_LIFE_DAYS) -> VideoMetrics:
+    """
+    Métriques sur toute la série de snapshots (un passage vectorisé) :
+    vpd (premier/dernier, comme compute_metrics), vpd_24h / vpd_7d / vpd_30d,
+    accel = (vpd_24h - vpd_7d) / 3 (vues/jour², écart entre les centres des fenêtres),
+    trend = vpd moyen des intervalles pondéré par la récence (demi-vie), multiplié
+    par la décroissance depuis le dernier snapshot (une vidéo plus suivie s'éteint).
+    Une vidéo qui a explosé puis stagné garde un vpd élevé mais un trend faible.
+    """
+    base = compute_metrics(cols)
+    offsets = np.asarray(cols.offsets, dtype=np.int64)
+    counts = base.counts
+    n = len(counts)
+    arrays = {k: np.zeros(n, dtype=np.float64) for k in ("vpd_24h", "vpd_7d", "vpd_30d", "accel", "trend")}
+
+    nonempty = counts > 0
+    if nonempty.any():
+        last = np.maximum(offsets[1:] - 1, offsets[:-1])
+        vidx = np.repeat(np.arange(n, dtype=np.int64), counts)
+        ts = np.asarray(cols.ts, dtype=np.int64)
+        uts = np.unique(ts)
+        # lignes triées par (vidéo, ts) -> clés croissantes, searchsorted direct
+        keys = vidx * (len(uts) + 1) + np.searchsorted(uts, ts)
+
+        for name, days in WINDOWS.items():
+            w = _window_vpd(cols, keys, uts, last, days * US_PER_DAY)
+            arrays["vpd_" + name] = np.where(nonempty, w, 0.0)
+        arrays["accel"] = (arrays["vpd_24h"] - arrays["vpd_7d"]) / 3.0
+
+        # Intervalles entre snapshots consécutifs d'une même vidéo
+        same = vidx[1:] == vidx[:-1]
+        seg_v = vidx[1:][same]
+        seg_days = (ts[1:][same] - ts[:-1][same]) / US_PER_DAY
+        seg_dviews = cols.views[1:][same].astype(np.float64) - cols.views[:-1][same].astype(np.float64)
+        now = ts.max()
+        mid_age = (now - (ts[1:][same] + ts[:-1][same]) / 2) / US_PER_DAY
+        decay = np.exp2(-mid_age / half_life_days)
+
+        num = np.bincount(seg_v, weights=seg_dviews * decay, minlength=n)
+        den = np.bincount(seg_v, weights=seg_days * decay, minlength=n)
+        recent = np.divide(num, den, out=np.zeros(n), where=den > 0)
+        staleness = np.where(nonempty, (now - ts[last]) / US_PER_DAY, 0.0)
+        arrays["trend"] = recent * np.exp2(-staleness / half_life_days)
+
+    return VideoMetrics(base.ids, **{k: getattr(base, k) for k in _BASE_FIELDS}, **arrays)
+
+
+def _flatten(snaps):
+    for lst in snaps.values():
+        yield from lst
+
+
+# Le store renvoie le même dict tant qu'il n'y a pas de nouvelle ingestion
+# (copy-on-write) : l'identité de l'objet suffit comme clé de cache.
+_LAST: Tuple[object, Optional[VideoMetrics]] = (None, None)
+
+
+_LAST_ROLLING: Tuple[object, Optional[VideoMetrics]] = (None, None)
+
+
+def video_metrics(snaps, rolling: bool = False) -> VideoMetrics:
+    """
+    snaps = SnapshotColumns (mmap) ou dict {video_id: [snapshots]}.
+    rolling=True : métriques par fenêtre (compute_rolling_metrics) en plus.
+    """
+    global _LAST, _LAST_ROLLING
+    compute = compute_rolling_metrics if rolling else compute_metrics
+    if isinstance(snaps, SnapshotColumns):
+        return compute(snaps)
+
+    last_src, last_metrics = _LAST_ROLLING if rolling else _LAST
+    if last_src is snaps and last_metrics is not None:
+        return last_metrics
+
+    # dict du store : colonnes maintenues à l'ingestion, pas de re-parse des timestamps
+    cols = columns_for(snaps)
+    if cols is None:
+        cols = build_columns(_flatten(snaps))
+    metrics = compute(cols)
+    if rolling:
+        _LAST_ROLLING = (snaps, metrics)
+    else:
+        _LAST = (snaps, metrics)
+    return metrics
+
+
+def clear_metrics_cache() -> None:
+    """Oublie les métriques mémoïsées (benchmarks à froid)."""
+    global _LAST, _LAST_ROLLING
+    _LAST = (None, None)
+    _LAST_ROLLING = (None, None)
+
+
+def views_per_day(snaps) -> float:
+    """Version unitaire (une liste de snapshots d'une vidéo)."""
+    # comme le tri stable (et compute_metrics) : à timestamp égal, premier puis dernier inséré
+    first = min(snaps, key=lambda x: x["timestamp"])
+    last = max(reversed(snaps), key=lambda x: x["timestamp"])
+    days = max(1e-6, (epoch_us(last["timestamp"]) - epoch_us(first["timestamp"])) / US_PER_DAY)
+    return (last["views"] - first["views"]) / days
+
+
+def top_k_indices(values, cand, k: Optional[int]):
+    """
+    Indices de cand triés par values décroissant, limités à k.
+    Sélection partielle (partition) puis tri des seuls candidats >= k-ième valeur.
+    À valeur égale, l'ordre d'origine de cand est conservé (y compris à la frontière k).
+    """
+    cand = np.asarray(cand, dtype=np.int64)
+    if k is not None and 0 <= k < len(cand):
+        if k == 0:
+            return cand[:0]
+        vals = values[cand]
+        kth = -np.partition(-vals, k - 1)[k - 1]
+        # tous les ex aequo de la k-ième valeur : le tri stable choisit les premiers de cand
+        cand = cand[vals >= kth]
+        return cand[np.argsort(-values[cand], kind="stable")][:k]
+    return cand[np.argsort(-values[cand], kind="stable")]
+
+
+def select_winners(videos, metrics: VideoMetrics, threshold_vpd: float, top_k: Optional[int] = None, keep=None, by: str = "vpd"):
+    """
+    Winners = vidéos avec >=2 snapshots, vpd >= seuil, présentes dans videos
+    et acceptées par keep(title). Retourne [(video_id, vpd)] triés par vpd.
+    by : colonne de RANK_MODES utilisée pour le seuil et le classement
+    (les fenêtres / trend demandent des métriques rolling).
+    """
+    if by not in RANK_MODES:
+        raise ValueError(f"Unknown ranking mode: {by}")
+    vpd = getattr(metrics, by)
+    cand = np.flatnonzero((metrics.counts >= 2) & (vpd >= threshold_vpd))
+
+    # Filtre titre uniquement sur les candidats numériques
+    ids = metrics.ids
+    sel = []
+    for i in cand:
+        v = videos.get(ids[i])
+        if v is None:
+            continue
+        if keep is not None and not keep(v.get("title", "")):
+            continue
+        sel.append(i)
+
+    order = top_k_indices(vpd, sel, top_k)
+    return [(ids[i], float(vpd[i])) for i in order]
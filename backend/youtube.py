@@ -1,25 +1,216 @@
 import os
+import contextvars
+import json
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+
+from .quota import QuotaLimiter, call_with_retry
 
 load_dotenv()
 
-def search_youtube(query: str, max_results: int = 10):
+# Clients YouTube réutilisables :
+# - le document de discovery est chargé/parsé une seule fois par process ;
+# - un pool de clients (httplib2.Http n'est pas thread-safe -> 1 client par
+#   thread à un instant donné, rendu au pool après usage) ;
+# - videos().list découpé en paquets de 50 ids, envoyés en une requête batch ;
+# - stats_scope() : cache des stats pour la durée d'une requête HTTP, pour que
+#   search_youtube puis analyze_market ne refassent pas le même appel.
+# googleapiclient (discovery + httplib2, lent à importer) n'est chargé qu'au
+# premier client créé : l'app sert /health sans l'avoir importé.
+
+MAX_IDS_PER_CALL = 50
+POOL_SIZE = int(os.getenv("YOUTUBE_POOL_SIZE", "4"))
+# ex: http://127.0.0.1:8765/ pour pointer sur un faux serveur d'API en local
+API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT")
+
+_doc_lock = threading.Lock()
+_doc: Optional[dict] = None
+
+
+def _api_key() -> str:
     api_key = os.getenv("YOUTUBE_API_KEY")
     if not api_key:
         raise RuntimeError("Missing YOUTUBE_API_KEY")
+    return api_key
+
+
+def _discovery_doc(api_key: str) -> dict:
+    global _doc
+    if _doc is None:
+        with _doc_lock:
+            if _doc is None:
+                doc = None
+                try:
+                    from googleapiclient.discovery_cache import get_static_doc
+                    doc = get_static_doc("youtube", "v3")
+                except ImportError:
+                    pass
+                if doc is None:
+                    # pas de doc embarqué dans cette version : une seule résolution réseau
+                    from googleapiclient.discovery import build
+                    _doc = build("youtube", "v3", developerKey=api_key)._rootDesc
+                else:
+                    _doc = json.loads(doc)
+    return _doc
+
+
+class YouTubePool:
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_client(self):
+        api_key = _api_key()
+        doc = _discovery_doc(api_key)
+        if API_ENDPOINT:
+            # rootUrl sert aussi à l'URL des requêtes batch
+            doc = dict(doc, rootUrl=API_ENDPOINT.rstrip("/") + "/")
+        from googleapiclient.discovery import build_from_document
+        return build_from_document(doc, developerKey=api_key)
 
+    @contextmanager
+    def client(self):
+        try:
+            yt = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    yt = self._new_client()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                yt = self._idle.get()
+        try:
+            yield yt
+        finally:
+            self._idle.put(yt)
+
+
+_POOL = YouTubePool()
+
+
+def get_pool() -> YouTubePool:
+    return _POOL
+
+
+# ----- cache de stats par requête -----
+_scope: contextvars.ContextVar = contextvars.ContextVar("youtube_stats_scope", default=None)
+
+
+@contextmanager
+def stats_scope():
+    """Active un cache {video_id: (parts, item)} pour la requête en cours."""
+    token = _scope.set({})
     try:
-        youtube = build("youtube", "v3", developerKey=api_key)
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _chunks(ids: List[str], n: int):
+    for i in range(0, len(ids), n):
+        yield ids[i:i + n]
+
 
-        search_response = youtube.search().list(
-            part="id,snippet",
-            q=query,
-            type="video",
-            maxResults=max_results,
-            order="relevance"
-        ).execute()
+def _execute(request, method: str, limiter: Optional[QuotaLimiter] = None, calls: int = 1):
+    """Exécute une requête (ou un batch de `calls` requêtes) : quota puis retry jitteré."""
+    if limiter is not None:
+        limiter.acquire(method, calls)
+    return call_with_retry(request.execute)
+
+
+def _list_videos(yt, ids: List[str], part: str, limiter: Optional[QuotaLimiter] = None) -> List[dict]:
+    """videos().list sur des paquets de 50 ids ; plusieurs paquets -> une seule requête batch."""
+    chunks = list(_chunks(ids, MAX_IDS_PER_CALL))
+    if len(chunks) == 1:
+        request = yt.videos().list(part=part, id=",".join(chunks[0]))
+        return _execute(request, "videos.list", limiter).get("items", [])
+
+    responses: Dict[str, dict] = {}
+
+    class _Batch:
+        # le batch entier est rejoué si une sous-requête échoue (erreurs -> retry)
+        def execute(self):
+            errors = []
+
+            def on_response(request_id, response, exception):
+                if exception is not None:
+                    errors.append(exception)
+                else:
+                    responses[request_id] = response
+
+            batch = yt.new_batch_http_request(callback=on_response)
+            for i, chunk in enumerate(chunks):
+                if str(i) not in responses:
+                    batch.add(yt.videos().list(part=part, id=",".join(chunk)), request_id=str(i))
+            batch.execute()
+            if errors:
+                raise errors[0]
+
+    _execute(_Batch(), "videos.list", limiter, calls=len(chunks))
+
+    items = []
+    for i in range(len(chunks)):
+        items.extend(responses.get(str(i), {}).get("items", []))
+    return items
+
+
+def get_videos(video_ids: Iterable[str], part: str = "snippet,statistics,contentDetails",
+               limiter: Optional[QuotaLimiter] = None) -> Dict[str, dict]:
+    """
+    {video_id: item} pour les ids demandés (ids inconnus de l'API absents).
+    Dans un stats_scope(), les ids déjà récupérés avec au moins ces parts ne
+    sont pas redemandés.
+    """
+    wanted = set(part.split(","))
+    ids = list(dict.fromkeys(v for v in video_ids if v))
+    cache = _scope.get()
+
+    found: Dict[str, dict] = {}
+    missing = []
+    for vid in ids:
+        hit = cache.get(vid) if cache is not None else None
+        if hit is not None and wanted <= hit[0]:
+            found[vid] = hit[1]
+        else:
+            missing.append(vid)
+
+    if missing:
+        with _POOL.client() as yt:
+            items = _list_videos(yt, missing, part, limiter)
+        for item in items:
+            found[item["id"]] = item
+            if cache is not None:
+                cache[item["id"]] = (wanted, item)
+
+    return {vid: found[vid] for vid in ids if vid in found}
+
+
+def search_youtube(query: str, max_results: int = 10):
+    _api_key()
+    from googleapiclient.errors import HttpError
+
+    try:
+        with _POOL.client() as youtube:
+            search_response = youtube.search().list(
+                part="id,snippet",
+                q=query,
+                type="video",
+                maxResults=max_results,
+                order="relevance"
+            ).execute()
 
         video_ids = [
             item.get("id", {}).get("videoId")
@@ -30,13 +221,10 @@ def search_youtube(query: str, max_results: int = 10):
         if not video_ids:
             return []
 
-        stats_response = youtube.videos().list(
-            part="snippet,statistics,contentDetails",
-            id=",".join(video_ids)
-        ).execute()
+        stats_items = get_videos(video_ids, part="snippet,statistics,contentDetails")
 
         videos = []
-        for item in stats_response.get("items", []):
+        for item in stats_items.values():
             stats = item.get("statistics", {}) or {}
             snippet = item.get("snippet", {}) or {}
 
@@ -50,4 +238,26 @@ def search_youtube(query: str, max_results: int = 10):
         return videos
 
     except HttpError as e:
-        raise RuntimeError(f"YouTube API error: {e}") from e
\ No newline at end of file
+        raise RuntimeError(f"YouTube API error: {e}") from e
+
+
+def list_channel_videos(channel_id: str, max_results: int = 25, limiter: Optional[QuotaLimiter] = None) -> List[dict]:
+    """
+    Dernières vidéos d'une chaîne (items videos().list : snippet + statistics).
+    Via la playlist "uploads" : 3 unités de quota au lieu de 100 pour search.list.
+    """
+    with _POOL.client() as yt:
+        channels = _execute(yt.channels().list(part="contentDetails", id=channel_id), "channels.list", limiter)
+        items = channels.get("items", [])
+        if not items:
+            return []
+        uploads = items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+        playlist = _execute(
+            yt.playlistItems().list(part="contentDetails", playlistId=uploads, maxResults=min(max_results, 50)),
+            "playlistItems.list",
+            limiter,
+        )
+
+    video_ids = [it["contentDetails"]["videoId"] for it in playlist.get("items", [])]
+    return list(get_videos(video_ids, part="snippet,statistics", limiter=limiter).values())
@@ -4,8 +4,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from backend.youtube import search_youtube
+from backend.youtube import search_youtube, stats_scope
 from backend.market import analyze_market
+from backend.timing import install as install_timing, span
 
 app = FastAPI()
 
@@ -23,13 +24,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing + GET /metrics
+install_timing(app)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 def run_agent(query: str):
-    videos = search_youtube(query)
-    results = analyze_market(videos)
+    with stats_scope():
+        with span("youtube"):
+            videos = search_youtube(query)
+        with span("analyze"):
+            results = analyze_market(videos)
 
     lines = []
     lines.append(f"# Résultats pour : {query}\n")
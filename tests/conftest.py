@@ -0,0 +1,116 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from backend import youtube
+
+
+class FakeYouTube:
+    """
+    Faux serveur YouTube Data API v3 (channels, playlistItems, videos, search .list).
+    quota_left : nombre de requêtes servies avant des 403 quotaExceeded (None = illimité).
+    Pas de requêtes batch : <= 50 ids par videos.list.
+    """
+
+    def __init__(self, channels: Dict[str, List[str]]):
+        self.channels = channels                  # channel_id -> video ids (plus récente d'abord)
+        self.quota_left: Optional[int] = None
+        self.requests: List[tuple] = []           # (méthode, paramètres)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def start(self) -> None:
+        threading.Thread(target=self._server.serve_forever, name="fake-youtube", daemon=True).start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def calls(self, method: str) -> List[dict]:
+        return [params for m, params in self.requests if m == method]
+
+    def _video(self, vid: str) -> dict:
+        n = sum(map(ord, vid))
+        return {
+            "id": vid,
+            "snippet": {"title": f"Video {vid}", "publishedAt": "2024-01-01T00:00:00Z"},
+            "statistics": {"viewCount": str(n * 100), "likeCount": str(n), "commentCount": "0"},
+        }
+
+    def _answer(self, method: str, params: Dict[str, str]):
+        if method == "channels":
+            cid = params.get("id")
+            if cid not in self.channels:
+                return {"items": []}
+            return {"items": [{"id": cid, "contentDetails": {"relatedPlaylists": {"uploads": "UU" + cid}}}]}
+        if method == "playlistItems":
+            vids = self.channels.get(params["playlistId"][2:], [])[:int(params.get("maxResults", 5))]
+            return {"items": [{"contentDetails": {"videoId": v}} for v in vids]}
+        if method == "videos":
+            known = {v for vids in self.channels.values() for v in vids}
+            return {"items": [self._video(v) for v in params["id"].split(",") if v in known]}
+        if method == "search":
+            vids = [v for vids in self.channels.values() for v in vids][:int(params.get("maxResults", 5))]
+            return {"items": [{"id": {"kind": "youtube#video", "videoId": v}} for v in vids]}
+        return None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                method = url.path.rstrip("/").rsplit("/", 1)[-1]
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                with fake._lock:
+                    fake.requests.append((method, params))
+                    exhausted = fake.quota_left is not None and fake.quota_left <= 0
+                    if fake.quota_left is not None and not exhausted:
+                        fake.quota_left -= 1
+                if exhausted:
+                    self._send(403, {"error": {"code": 403, "message": "The request cannot be completed "
+                                               "because you have exceeded your quota.",
+                                               "errors": [{"reason": "quotaExceeded", "domain": "youtube.quota"}]}})
+                    return
+                body = fake._answer(method, params)
+                if body is None:
+                    self._send(404, {"error": {"code": 404, "message": f"unknown method {method}"}})
+                else:
+                    self._send(200, body)
+
+            def _send(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def fake_youtube(monkeypatch):
+    """Faux serveur + backend.youtube pointé dessus (ce que fait YOUTUBE_API_ENDPOINT)."""
+    server = FakeYouTube({
+        "UCalpha": ["a1", "a2", "a3"],
+        "UCbeta": ["b1", "b2"],
+        "UCgamma": ["c1", "c2", "c3"],
+        "UCdelta": ["d1"],
+    })
+    server.start()
+    monkeypatch.setenv("YOUTUBE_API_KEY", "test-key")
+    # YOUTUBE_API_ENDPOINT est lu à l'import : même effet, et un pool neuf pour ne
+    # pas réutiliser des clients construits vers une autre URL
+    monkeypatch.setattr(youtube, "API_ENDPOINT", server.url)
+    monkeypatch.setattr(youtube, "_POOL", youtube.YouTubePool())
+    yield server
+    server.stop()
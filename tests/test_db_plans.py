@@ -0,0 +1,60 @@
+import pytest
+
+from backend import db
+
+
+@pytest.fixture
+def plans_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "plans.db"))
+    db.init_db()
+    yield db
+    db.close_thread_conn()
+
+
+def _row(created_at, niche="saas"):
+    return {"created_at": created_at, "niche": niche, "objective": "leads", "threshold_vpd": 20000,
+            "top_k": 25, "ideas": 10, "days": 30}
+
+
+def test_dated_listing_does_not_assume_created_at_follows_id(plans_db):
+    # backfill de plans anciens après des plans récents : created_at ne croît pas avec id
+    recent = plans_db.insert_plans([_row("2024-03-01T10:00:00"), _row("2024-03-02T10:00:00")])
+    old = plans_db.insert_plans([_row("2024-01-05T10:00:00"), _row("2024-01-06T10:00:00"),
+                                 _row("2024-01-06T10:00:00")])
+
+    rows = plans_db.list_plans(created_from="2024-01-01", created_to="2024-01-31")
+    assert [r["id"] for r in rows] == [old[2], old[1], old[0]]
+
+    rows = plans_db.list_plans(created_from="2024-02-01")
+    assert [r["id"] for r in rows] == [recent[1], recent[0]]
+
+    rows = plans_db.list_plans(created_to="2024-01-05")
+    assert [r["id"] for r in rows] == [old[0]]
+
+
+def test_dated_keyset_pages_cover_every_plan_once(plans_db):
+    ids = plans_db.insert_plans([_row(f"2024-01-{d:02d}T12:00:00") for d in (9, 3, 7, 3, 1, 8, 3, 5)])
+    expected = [r["id"] for r in plans_db.list_plans(limit=100, created_from="2024-01-01")]
+    assert sorted(expected) == sorted(ids)
+
+    seen, before = [], None
+    while True:
+        page = plans_db.list_plans(limit=3, before_id=before, created_from="2024-01-01")
+        seen += [r["id"] for r in page]
+        if len(page) < 3:
+            break
+        before = page[-1]["id"]
+    assert seen == expected
+    created = [r["created_at"] for r in plans_db.list_plans(limit=100, created_to="2024-12-31")]
+    assert created == sorted(created, reverse=True)
+
+
+def test_dated_listing_uses_created_index(plans_db):
+    con = plans_db._conn()
+    plan = con.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM plans WHERE created_at >= ? AND (created_at, id) < (?, ?)"
+        " ORDER BY created_at DESC, id DESC LIMIT 20", ("2024-01-01", "2024-02-01", 10)
+    ).fetchall()
+    detail = " ".join(r["detail"] for r in plan)
+    assert "idx_plans_created" in detail
+    assert "TEMP B-TREE" not in detail
@@ -0,0 +1,79 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend import seed_scan
+from backend.youtube import search_youtube
+
+CHANNELS = {"Alpha": "UCalpha", "Beta": "UCbeta", "Gamma": "UCgamma", "Delta": "UCdelta"}
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Chaînes passées au stockage, dans l'ordre (pas d'écriture dans data/)."""
+    out = []
+    monkeypatch.setattr(seed_scan, "store_channel_videos",
+                        lambda name, items: out.append((name, sorted(v["id"] for v in items))))
+    monkeypatch.setattr(seed_scan, "flush_storage", lambda: None)
+    return out
+
+
+def _write_checkpoint(path, started_at, done):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"started_at": started_at.isoformat(), "done": done}, f)
+
+
+def test_scan_stops_on_quota_exceeded_and_resumes_from_checkpoint(fake_youtube, stored, tmp_path):
+    ckpt = str(tmp_path / "checkpoint.json")
+    # channels + playlistItems + videos : 3 requêtes par chaîne -> 2 chaînes puis 403 quotaExceeded
+    fake_youtube.quota_left = 6
+
+    summary = seed_scan.scan(CHANNELS, max_results=5, workers=1, checkpoint_path=ckpt)
+
+    assert summary["scanned"] == 2
+    assert summary["failed"] == []
+    with open(ckpt, encoding="utf-8") as f:
+        assert json.load(f)["done"] == ["UCalpha", "UCbeta"]
+    assert stored == [("Alpha", ["a1", "a2", "a3"]), ("Beta", ["b1", "b2"])]
+
+    # quota revenu : reprise sur les chaînes restantes seulement
+    fake_youtube.quota_left = None
+    fake_youtube.requests.clear()
+    summary = seed_scan.scan(CHANNELS, max_results=5, workers=1, checkpoint_path=ckpt)
+
+    assert (summary["scanned"], summary["skipped"]) == (2, 2)
+    assert sorted(p["id"] for p in fake_youtube.calls("channels")) == ["UCdelta", "UCgamma"]
+    assert [name for name, _ in stored] == ["Alpha", "Beta", "Gamma", "Delta"]
+    # scan complet : checkpoint supprimé
+    assert not os.path.exists(ckpt)
+
+
+def test_scan_ignores_checkpoint_older_than_scan_window(fake_youtube, stored, tmp_path):
+    ckpt = str(tmp_path / "checkpoint.json")
+    old = datetime.now(timezone.utc) - timedelta(hours=seed_scan.SCAN_WINDOW_H + 1)
+    _write_checkpoint(ckpt, old, ["UCalpha", "UCbeta"])
+
+    summary = seed_scan.scan(CHANNELS, max_results=5, workers=2, checkpoint_path=ckpt)
+
+    assert (summary["scanned"], summary["skipped"]) == (4, 0)
+    assert sorted(name for name, _ in stored) == ["Alpha", "Beta", "Delta", "Gamma"]
+
+
+def test_scan_resumes_recent_checkpoint(fake_youtube, stored, tmp_path):
+    ckpt = str(tmp_path / "checkpoint.json")
+    _write_checkpoint(ckpt, datetime.now(timezone.utc) - timedelta(hours=1), ["UCalpha"])
+
+    summary = seed_scan.scan(CHANNELS, max_results=5, workers=2, checkpoint_path=ckpt)
+
+    assert (summary["scanned"], summary["skipped"]) == (3, 1)
+    assert "UCalpha" not in [p["id"] for p in fake_youtube.calls("channels")]
+
+
+def test_search_through_fake_api(fake_youtube):
+    videos = search_youtube("saas", max_results=4)
+
+    assert [v["video_id"] for v in videos] == ["a1", "a2", "a3", "b1"]
+    assert all(v["views"] > 0 for v in videos)
+    assert [p["id"] for p in fake_youtube.calls("videos")] == ["a1,a2,a3,b1"]
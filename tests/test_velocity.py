@@ -0,0 +1,39 @@
+import numpy as np
+
+from backend.velocity import top_k_indices, video_metrics, views_per_day
+
+
+def _snap(vid, ts, views):
+    return {"video_id": vid, "timestamp": ts, "views": views, "likes": 0, "comments": 0}
+
+
+def test_top_k_keeps_candidate_order_among_ties_at_k():
+    values = np.array([5.0, 3.0, 3.0, 3.0, 1.0])
+    assert top_k_indices(values, [0, 1, 2, 3, 4], 2).tolist() == [0, 1]
+    assert top_k_indices(values, [0, 1, 2, 3, 4], 3).tolist() == [0, 1, 2]
+    # l'ordre de cand départage, pas l'indice
+    assert top_k_indices(values, [4, 3, 2, 1, 0], 2).tolist() == [0, 3]
+    assert top_k_indices(values, [4, 3, 2, 1, 0], 0).tolist() == []
+
+
+def test_top_k_matches_full_stable_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        values = rng.integers(0, 4, size=30).astype(np.float64)
+        cand = rng.permutation(30)[:20]
+        full = cand[np.argsort(-values[cand], kind="stable")]
+        for k in (1, 5, 19, 20, None):
+            expected = full if k is None else full[:k]
+            assert top_k_indices(values, cand, k).tolist() == expected.tolist()
+
+
+def test_views_per_day_takes_last_of_equal_timestamps():
+    snaps = [
+        _snap("a", "2024-01-01T00:00:00", 100),
+        _snap("a", "2024-01-01T00:00:00", 150),
+        _snap("a", "2024-01-02T00:00:00", 200),
+        _snap("a", "2024-01-02T00:00:00", 300),
+    ]
+    # premier des plus anciens (100), dernier des plus récents (300), sur 1 jour
+    assert views_per_day(snaps) == 200.0
+    assert float(video_metrics({"a": snaps}).vpd[0]) == 200.0